@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +9,60 @@ class Settings(BaseSettings):
     port: int = 8000
     scan_on_startup: bool = True
     page_size: int = 24
+    # SQLite connection tuning, applied to every connection on connect
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist"] = "wal"
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: Literal["default", "file", "memory"] = "memory"
+    sqlite_busy_timeout_ms: int = 5000
+    # Read-only endpoints use their own pool; all writes share one connection
+    db_read_pool_size: int = 8
+    db_write_timeout_seconds: float = 30.0
+    # Scanner pipeline: 0 workers means one per CPU. Threads suit I/O-bound
+    # (e.g. NFS) libraries; processes also parallelise JSON decoding.
+    scan_workers: int = 0
+    scan_use_processes: bool = False
+    scan_queue_depth: int = 256
+    scan_batch_size: int = 500
+    # Partial mp4 hash (size plus first, middle and last blocks) used to find
+    # duplicate downloads; three small reads per new or changed file
+    scan_content_hash: bool = True
+    # Slim info.json extracts; defaults to "metadata-cache" next to the SQLite DB
+    metadata_cache_dir: str = ""
+    # Threads reading media files for streams that can't use pathsend
+    stream_io_threads: int = 32
+    # Video ids whose media path is kept in memory for stream requests
+    media_cache_size: int = 4096
+    # Cache-Control max-age for media; clients revalidate with ETag after
+    stream_max_age: int = 86400
+    # Thumbnails: scaled with ffmpeg from a folder image or a video frame;
+    # the cache defaults to "thumbnail-cache" next to the SQLite DB
+    thumbnail_cache_dir: str = ""
+    thumbnail_workers: int = 2
+    thumbnail_seek_seconds: float = 5.0
+    thumbnail_timeout_seconds: float = 30.0
+    thumbnail_max_age: int = 2592000
+    ffmpeg_path: str = "ffmpeg"
+    # Serve tag autocomplete (prefix, substring and typo matches) from memory
+    tag_index_enabled: bool = False
+    # Serialized /api/videos pages, dropped whenever the library version changes
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl_seconds: float = 600.0
+    # Facet counts from an older library version are served for this long
+    # (e.g. while a scan commits batch after batch); 0 disables
+    facet_cache_stale_seconds: float = 30.0
+    # Prometheus text format at /metrics; SLOW_QUERY_MS > 0 logs statements
+    # (with parameters) that take at least that long
+    metrics_enabled: bool = True
+    slow_query_ms: float = 0.0
+    # Live updates: sync changed folders from filesystem events (or polling)
+    watch_library: bool = False
+    watch_force_polling: bool = False
+    watch_debounce_seconds: float = 2.0
+    watch_poll_interval_seconds: float = 10.0
 
     class Config:
         env_file = ".env"
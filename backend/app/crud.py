@@ -1,21 +1,170 @@
+import base64
+import json
+from collections import OrderedDict
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Literal, NamedTuple, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import Integer, and_, case, func, literal, literal_column, or_, select, text, tuple_, union_all
 from sqlalchemy.orm import Session
 
+from . import search, tag_counts
 from .config import settings
+from .library import bump_library_version
 from .models import Tag, Video, VideoTag
-from .scanner import _add_tag_to_video, _get_or_create_tag
+from .scanner import _add_tag_to_video, _get_or_create_tag, _nocase
+from .tag_index import tag_index
 
 
 SortOrder = Literal["epoch_desc", "epoch_asc"]
 
+# Columns of a VideoSummary; list queries select these instead of ORM objects
+SUMMARY_COLUMNS = (
+    Video.id, Video.folder_name, Video.title, Video.uploader, Video.uploader_url,
+    Video.webpage_url, Video.thumbnail, Video.duration, Video.width, Video.height,
+    Video.aspect_ratio, Video.like_count, Video.repost_count, Video.comment_count,
+    Video.extractor, Video.post_timestamp, Video.epoch, Video.is_available,
+)
+
 
 # ---------------------------------------------------------------------------
 # Videos
 # ---------------------------------------------------------------------------
 
+def _encode_cursor(position) -> str:
+    """``position`` is ``[epoch, id]`` for keyset pages or an int offset
+    for ranked search pages, which have no stable sort key."""
+    raw = json.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if isinstance(position, int) and position >= 0:
+        return position
+    if (
+        isinstance(position, list) and len(position) == 2
+        and isinstance(position[1], str)
+        and (position[0] is None or isinstance(position[0], int))
+    ):
+        return tuple(position)
+    raise ValueError("Invalid cursor")
+
+
+def _keyset_segments(descending: bool, epoch: Optional[int], video_id: str) -> list:
+    """Filters selecting the rows after ``(epoch, video_id)``, in order.
+
+    SQLite sorts NULL epochs first ascending and last descending, and a row
+    value comparison against NULL matches nothing, so the NULL block is
+    queried as its own segment. Each segment is a single range seek on
+    ``idx_videos_available_epoch``.
+    """
+    key = tuple_(Video.epoch, Video.id)
+    if descending:
+        if epoch is None:
+            return [and_(Video.epoch.is_(None), Video.id < video_id)]
+        return [key < tuple_(epoch, video_id), Video.epoch.is_(None)]
+    if epoch is None:
+        return [and_(Video.epoch.is_(None), Video.id > video_id), Video.epoch.isnot(None)]
+    return [key > tuple_(epoch, video_id)]
+
+
+def _resolve_tag_ids(db: Session, names: list[str]) -> dict[str, int]:
+    """Map ``_nocase`` names to tag ids in one query on idx_tags_name_nocase.
+
+    Keys are folded like the NOCASE match itself (ASCII only), so names
+    NOCASE keeps apart, such as "Émile" and "émile", keep their own ids.
+    """
+    if not names:
+        return {}
+    rows = db.execute(
+        select(Tag.id, Tag.name)
+        .where(Tag.name.collate("NOCASE").in_(names))
+        .order_by(Tag.id)
+    )
+    ids: dict[str, int] = {}
+    for tag_id, name in rows:
+        ids.setdefault(_nocase(name), tag_id)
+    return ids
+
+
+def _tag_filters(db: Session, all_of: list[str], any_of: list[str], none_of: list[str]) -> Optional[list]:
+    """Compile tag AND/OR/NOT filters into set-based ``video_tags`` subqueries.
+
+    Returns None when the filter can't match anything.
+    """
+    ids = _resolve_tag_ids(db, list({*all_of, *any_of, *none_of}))
+    filters = []
+
+    if all_of:
+        all_ids = {ids.get(_nocase(name)) for name in all_of}
+        if None in all_ids:
+            return None
+        filters.append(Video.id.in_(
+            select(VideoTag.video_id)
+            .where(VideoTag.tag_id.in_(all_ids))
+            .group_by(VideoTag.video_id)
+            .having(func.count() == len(all_ids))
+        ))
+
+    if any_of:
+        any_ids = {ids[_nocase(name)] for name in any_of if _nocase(name) in ids}
+        if not any_ids:
+            return None
+        filters.append(Video.id.in_(
+            select(VideoTag.video_id).where(VideoTag.tag_id.in_(any_ids))
+        ))
+
+    none_ids = {ids[_nocase(name)] for name in none_of if _nocase(name) in ids}
+    if none_ids:
+        filters.append(Video.id.notin_(
+            select(VideoTag.video_id).where(VideoTag.tag_id.in_(none_ids))
+        ))
+
+    return filters
+
+
+def _match(text_query: Optional[str]) -> Optional[str]:
+    match = search.match_expression(text_query) if text_query else None
+    if match is not None and not search.SEARCH_ENABLED:
+        raise ValueError("Full-text search is not available")
+    return match
+
+
+def _filter_videos(
+    db: Session,
+    q,
+    match: Optional[str],
+    available_only: bool,
+    collapse_duplicates: bool,
+    tags: list[str] | None,
+    any_tags: list[str] | None,
+    exclude_tags: list[str] | None,
+):
+    """Apply the list filters to ``q``; None if nothing can match."""
+    if match is not None:
+        q = (
+            q.join(search.videos_fts, search.videos_fts.c.video_id == Video.id)
+            .filter(search.MATCH_TARGET.match(match))
+        )
+
+    if available_only:
+        q = q.filter(Video.is_available == True)  # noqa: E712
+
+    if collapse_duplicates:
+        q = q.filter(_first_copy(available_only))
+
+    if tags or any_tags or exclude_tags:
+        tag_filters = _tag_filters(db, tags or [], any_tags or [], exclude_tags or [])
+        if tag_filters is None:
+            return None
+        q = q.filter(*tag_filters)
+    return q
+
+
 def get_videos(
     db: Session,
     page: int = 1,
@@ -23,48 +172,330 @@ def get_videos(
     sort: SortOrder = "epoch_desc",
     tags: list[str] | None = None,
     available_only: bool = True,
-) -> tuple[list[Video], int]:
-    q = db.query(Video)
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    any_tags: list[str] | None = None,
+    exclude_tags: list[str] | None = None,
+    text_query: Optional[str] = None,
+    collapse_duplicates: bool = False,
+) -> tuple[list[dict], Optional[int], Optional[str]]:
+    """Return ``(items, total, next_cursor)``.
 
-    if available_only:
-        q = q.filter(Video.is_available == True)  # noqa: E712
+    Videos must carry all of ``tags``, at least one of ``any_tags`` and
+    none of ``exclude_tags``. Items are plain dicts of ``SUMMARY_COLUMNS``
+    plus ``tags``, loaded with one query for the page and one for all of
+    its tags. With ``cursor`` (a ``next_cursor`` from a previous call) the
+    page is found by seeking on ``(epoch, id)`` instead of ``OFFSET``, so
+    every page costs the same. ``total`` is None unless ``with_total``.
+
+    ``text_query`` switches to full-text search: results are ranked by
+    relevance instead of ``sort`` and each item carries a ``snippet`` (HTML:
+    escaped text with the matches in ``<mark>``).
+
+    ``collapse_duplicates`` keeps only the first-scanned video of each
+    group sharing a ``content_hash``.
+    """
+    match = _match(text_query)
+    q = db.query(*SUMMARY_COLUMNS)
+    if match is not None:
+        q = q.add_columns(search.SNIPPET.label("snippet"))
+    q = _filter_videos(db, q, match, available_only, collapse_duplicates, tags, any_tags, exclude_tags)
+    if q is None:
+        # A required tag doesn't exist → no results
+        return [], 0 if with_total else None, None
+
+    total = q.count() if with_total else None
 
-    if tags:
-        for tag_name in tags:
-            tag = db.query(Tag).filter(Tag.name.ilike(tag_name)).first()
-            if tag:
-                q = q.filter(Video.tags.any(Tag.id == tag.id))
-            else:
-                # Tag doesn't exist → no results
-                return [], 0
-
-    if sort == "epoch_desc":
-        q = q.order_by(Video.epoch.desc().nullslast())
+    # SQLite's native NULL placement gives "nulls last" for desc and
+    # "nulls first" for asc; id breaks ties so the cursor is unambiguous.
+    descending = sort == "epoch_desc"
+    if descending:
+        order = (Video.epoch.desc(), Video.id.desc())
     else:
-        q = q.order_by(Video.epoch.asc().nullsfirst())
+        order = (Video.epoch.asc(), Video.id.asc())
+
+    if match is not None:
+        order = (search.RANK, Video.id)
+
+    # One extra row tells us whether there is a next page
+    limit = page_size + 1
+    position = _decode_cursor(cursor) if cursor is not None else (page - 1) * page_size
+    if isinstance(position, int):
+        items = q.order_by(*order).offset(position).limit(limit).all()
+    else:
+        if match is not None:
+            raise ValueError("Invalid cursor")
+        items = []
+        for segment in _keyset_segments(descending, *position):
+            items += q.filter(segment).order_by(*order).limit(limit - len(items)).all()
+            if len(items) >= limit:
+                break
+
+    next_cursor = None
+    if len(items) > page_size:
+        last = items[page_size - 1]
+        if match is not None:
+            next_cursor = _encode_cursor(position + page_size)
+        else:
+            next_cursor = _encode_cursor([last.epoch, last.id])
+    items = items[:page_size]
+    tag_names = get_tag_names(db, [row.id for row in items])
+    videos = [{**row._asdict(), "tags": tag_names.get(row.id, [])} for row in items]
+    if match is not None:
+        for video in videos:
+            video["snippet"] = search.render_snippet(video["snippet"])
+    return videos, total, next_cursor
 
-    total = q.count()
-    offset = (page - 1) * page_size
-    items = q.offset(offset).limit(page_size).all()
-    return items, total
+
+FACETS = ("uploader", "extractor", "duration", "tags")
+# (upper bound in seconds, label); longer videos fall in DURATION_OVER
+DURATION_BUCKETS = ((60, "<1m"), (300, "1-5m"), (1200, "5-20m"), (3600, "20-60m"))
+DURATION_OVER = "60m+"
+
+
+def get_facets(
+    db: Session,
+    facets: list[str],
+    limit: int = 10,
+    tags: list[str] | None = None,
+    any_tags: list[str] | None = None,
+    exclude_tags: list[str] | None = None,
+    available_only: bool = True,
+    text_query: Optional[str] = None,
+    collapse_duplicates: bool = False,
+) -> dict[str, list[dict]]:
+    """Top ``limit`` ``{"value", "count"}`` pairs per facet for the videos
+    ``get_videos`` would return with the same filters.
+
+    All facets come from one statement of grouped counts joined with
+    UNION ALL. Only filtered requests count over a (materialized) CTE of
+    the matching videos. Without filters each count scans an
+    ``idx_videos_available_*`` index of ``videos`` directly, and tag counts
+    come from ``tags.video_count`` (see ``tag_counts``). Duration buckets
+    are returned shortest first, everything else by count; NULLs are left
+    out and so are the ``tags`` being filtered on.
+    """
+    facets = [name for name in FACETS if name in facets]
+    result: dict[str, list[dict]] = {name: [] for name in facets}
+    if not facets:
+        return result
+
+    match = _match(text_query)
+    q = db.query(Video.id, Video.uploader, Video.extractor, Video.duration)
+    q = _filter_videos(db, q, match, available_only, collapse_duplicates, tags, any_tags, exclude_tags)
+    if q is None:
+        return result
+    filtered = match is not None or collapse_duplicates or tags or any_tags or exclude_tags
+    if filtered:
+        # Materialized so the filters run once for all the facets
+        source = q.cte("matched").prefix_with("MATERIALIZED")
+        where = []
+    else:
+        source = Video.__table__
+        where = [source.c.is_available == True] if available_only else []  # noqa: E712
+
+    count = func.count()
+    parts = []
+    for name in facets:
+        if name in ("uploader", "extractor"):
+            value = source.c[name]
+            part = (
+                select(literal(name).label("facet"), value.label("value"), count.label("count"))
+                .where(value.is_not(None), *where)
+                .group_by(value)
+                .order_by(count.desc(), value)
+            )
+        elif name == "duration":
+            bucket = case(
+                *((source.c.duration < bound, label) for bound, label in DURATION_BUCKETS),
+                else_=DURATION_OVER,
+            )
+            part = (
+                select(literal(name).label("facet"), bucket.label("value"), count.label("count"))
+                .where(source.c.duration.is_not(None), *where)
+                .group_by(bucket)
+            )
+        elif filtered or not available_only:
+            # Count links per tag id first; names are only looked up for the
+            # top ones. IN lets SQLite probe a Bloom filter of the matched ids,
+            # which is several times faster than joining the CTE.
+            required = list(_resolve_tag_ids(db, tags).values()) if tags else []
+            links = [VideoTag.video_id.in_(select(source.c.id))] if filtered else []
+            top = (
+                select(VideoTag.tag_id, count.label("count"))
+                .where(*links, VideoTag.tag_id.not_in(required))
+                .group_by(VideoTag.tag_id)
+                .order_by(count.desc(), VideoTag.tag_id)
+                .limit(limit)
+                .subquery()
+            )
+            part = (
+                select(literal(name).label("facet"), Tag.name.label("value"), top.c.count)
+                .join(Tag, Tag.id == top.c.tag_id)
+            )
+        else:
+            part = (
+                select(literal(name).label("facet"), Tag.name.label("value"), Tag.video_count.label("count"))
+                .where(Tag.video_count > 0)
+                .order_by(Tag.video_count.desc(), Tag.name)
+            )
+        if name != "duration":
+            part = part.limit(limit)
+        parts.append(select(part.subquery()))
+
+    for facet, value, n in db.execute(union_all(*parts)):
+        result[facet].append({"value": value, "count": n})
+    # UNION ALL doesn't keep each part's order
+    order = {label: i for i, (_, label) in enumerate(DURATION_BUCKETS + ((None, DURATION_OVER),))}
+    for facet, counts in result.items():
+        if facet == "duration":
+            counts.sort(key=lambda c: order[c["value"]])
+        else:
+            counts.sort(key=lambda c: (-c["count"], c["value"]))
+    return result
+
+
+def _first_copy(available_only: bool):
+    """Filter out videos with an earlier-scanned copy (lower rowid).
+
+    Each check is one seek on ``idx_videos_content_hash``. Without ANALYZE
+    statistics SQLite prefers ``idx_videos_available`` plus a rowid range
+    here, which is quadratic, so the index is named explicitly.
+    """
+    available = " AND copy.is_available = 1" if available_only else ""
+    return or_(Video.content_hash.is_(None), text(
+        "NOT EXISTS (SELECT 1 FROM videos AS copy INDEXED BY idx_videos_content_hash "
+        f"WHERE copy.content_hash = videos.content_hash AND copy.rowid < videos.rowid{available})"
+    ))
+
+
+def get_duplicate_groups(db: Session, page: int = 1, page_size: int = 20) -> tuple[list[dict], int]:
+    """Return ``(groups, total)`` of available videos sharing a content hash.
+
+    Groups are ordered by the disk space their extra copies take up. Each
+    carries its ``videos`` as summary dicts (with tags), first-scanned first.
+    One pass over ``idx_videos_content_hash`` finds the page and the total;
+    availability is summed rather than filtered so no other index is used.
+    """
+    copies = func.sum(Video.is_available, type_=Integer)
+    media_size = func.max(Video.media_size)
+    wasted = media_size * (copies - 1)
+    rows = db.execute(
+        select(
+            Video.content_hash,
+            copies.label("copies"),
+            media_size.label("media_size"),
+            wasted.label("wasted_bytes"),
+            func.count().over().label("total"),
+        )
+        .where(Video.content_hash.is_not(None))
+        .group_by(Video.content_hash)
+        .having(copies > 1)
+        .order_by(wasted.desc(), Video.content_hash)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    ).all()
+    if not rows:
+        total = 0 if page == 1 else get_duplicate_groups(db, 1, 1)[1]
+        return [], total
+    total = rows[0].total
+    groups = [{key: value for key, value in row._asdict().items() if key != "total"} for row in rows]
+
+    rows = (
+        db.query(*SUMMARY_COLUMNS, Video.content_hash)
+        .filter(Video.content_hash.in_([g["content_hash"] for g in groups]), Video.is_available == True)  # noqa: E712
+        .order_by(Video.content_hash, literal_column("videos.rowid"))
+        .all()
+    )
+    tag_names = get_tag_names(db, [row.id for row in rows])
+    videos: dict[str, list[dict]] = {}
+    for row in rows:
+        item = row._asdict()
+        videos.setdefault(item.pop("content_hash"), []).append({**item, "tags": tag_names.get(row.id, [])})
+    for group in groups:
+        group["videos"] = videos.get(group["content_hash"], [])
+    return groups, total
 
 
 def get_video(db: Session, video_id: str) -> Optional[Video]:
     return db.query(Video).filter_by(id=video_id).first()
 
 
+def get_video_detail(db: Session, video_id: str) -> Optional[dict]:
+    row = db.query(*SUMMARY_COLUMNS, Video.description).filter(Video.id == video_id).first()
+    if row is None:
+        return None
+    return {**row._asdict(), "tags": get_video_tags(db, video_id)}
+
+
+def get_tag_names(db: Session, video_ids: list[str]) -> dict[str, list[str]]:
+    """Map each video id to its tag names using a single query."""
+    if not video_ids:
+        return {}
+    rows = db.execute(
+        select(VideoTag.video_id, Tag.name)
+        .join(Tag, Tag.id == VideoTag.tag_id)
+        .where(VideoTag.video_id.in_(video_ids))
+        .order_by(VideoTag.video_id, VideoTag.tag_id)
+    )
+    tag_names: dict[str, list[str]] = {}
+    for video_id, name in rows:
+        tag_names.setdefault(video_id, []).append(name)
+    return tag_names
+
+
 def get_video_tags(db: Session, video_id: str) -> list[str]:
-    video = get_video(db, video_id)
-    if not video:
-        return []
-    return [t.name for t in video.tags]
+    return get_tag_names(db, [video_id]).get(video_id, [])
+
 
+class MediaFile(NamedTuple):
+    path: Path
+    size: int
+    mtime_ns: int
 
-def resolve_video_file(video: Video) -> Optional[Path]:
-    """Return the actual .mp4 path for a video, or None if not found."""
-    folder = Path(settings.video_dir) / video.folder_name
-    mp4_files = list(folder.glob("*.mp4"))
-    return mp4_files[0] if mp4_files else None
+
+# video id -> media path, most recently used last
+_media_paths: "OrderedDict[str, Path]" = OrderedDict()
+
+
+def _stat_media(path: Path) -> Optional[MediaFile]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return MediaFile(path, st.st_size, st.st_mtime_ns)
+
+
+def resolve_media(db: Session, video_id: str) -> Optional[MediaFile]:
+    """Locate a video's media file with a single ``stat`` when possible.
+
+    Hot videos are answered from an in-process LRU of paths without touching
+    the DB; otherwise the path recorded by the scanner is used, and only
+    rows scanned before that existed fall back to globbing the folder.
+    Returns None if the video or its file doesn't exist.
+    """
+    path = _media_paths.get(video_id)
+    if path is not None:
+        media = _stat_media(path)
+        if media is not None:
+            _media_paths.move_to_end(video_id)
+            return media
+        del _media_paths[video_id]
+
+    row = db.query(Video.folder_name, Video.media_file).filter(Video.id == video_id).first()
+    if row is None:
+        return None
+    media = None
+    if row.media_file:
+        media = _stat_media(Path(settings.video_dir) / row.folder_name / row.media_file)
+    if media is None:
+        mp4_files = list((Path(settings.video_dir) / row.folder_name).glob("*.mp4"))
+        media = _stat_media(mp4_files[0]) if mp4_files else None
+    if media is not None:
+        _media_paths[video_id] = media.path
+        if len(_media_paths) > settings.media_cache_size:
+            _media_paths.popitem(last=False)
+    return media
 
 
 # ---------------------------------------------------------------------------
@@ -72,24 +503,21 @@ def resolve_video_file(video: Video) -> Optional[Path]:
 # ---------------------------------------------------------------------------
 
 def get_tags(db: Session, q: Optional[str] = None, limit: int = 50) -> list[dict]:
-    usage_count = (
-        select(func.count(VideoTag.video_id))
-        .where(VideoTag.tag_id == Tag.id)
-        .correlate(Tag)
-        .scalar_subquery()
-    )
-
-    query = db.query(Tag, usage_count.label("video_count"))
+    """Tags ranked by how many available videos carry them, optionally
+    limited to names starting with ``q`` (case-insensitive)."""
+    query = db.query(Tag.id, Tag.name, Tag.video_count)
 
     if q:
-        query = query.filter(Tag.name.ilike(f"{q}%"))
+        # Range over the case-folded name index instead of a LIKE scan
+        prefix = q.casefold()
+        query = query.filter(Tag.name_folded >= prefix, Tag.name_folded < prefix + "\U0010ffff")
 
-    query = query.order_by(usage_count.desc(), Tag.name)
+    query = query.order_by(Tag.video_count.desc(), Tag.name)
     query = query.limit(limit)
 
     return [
-        {"id": tag.id, "name": tag.name, "video_count": count or 0}
-        for tag, count in query.all()
+        {"id": tag_id, "name": name, "video_count": count or 0}
+        for tag_id, name, count in query.all()
     ]
 
 
@@ -97,10 +525,16 @@ def add_tag_to_video(db: Session, video_id: str, tag_name: str) -> list[str]:
     video = get_video(db, video_id)
     if not video:
         return []
-    _add_tag_to_video(db, video_id, tag_name.strip())
+    tag_id = _add_tag_to_video(db, video_id, tag_name.strip())
+    if tag_id is not None and video.is_available:
+        tag_counts.adjust_tag_count(db, tag_id, +1)
+    db.flush()
+    search.reindex_videos(db, [video_id])
+    bump_library_version(db)
     db.commit()
-    db.refresh(video)
-    return [t.name for t in video.tags]
+    if tag_id is not None:
+        tag_index.refresh_tags([tag_id])
+    return get_video_tags(db, video_id)
 
 
 def remove_tag_from_video(db: Session, video_id: str, tag_id: int) -> list[str]:
@@ -110,9 +544,14 @@ def remove_tag_from_video(db: Session, video_id: str, tag_id: int) -> list[str]:
     vt = db.query(VideoTag).filter_by(video_id=video_id, tag_id=tag_id).first()
     if vt:
         db.delete(vt)
+        if video.is_available:
+            tag_counts.adjust_tag_count(db, tag_id, -1)
+        db.flush()
+        search.reindex_videos(db, [video_id])
+        bump_library_version(db)
         db.commit()
-    db.refresh(video)
-    return [t.name for t in video.tags]
+        tag_index.refresh_tags([tag_id])
+    return get_video_tags(db, video_id)
 
 
 # ---------------------------------------------------------------------------
@@ -1,37 +1,162 @@
 from pathlib import Path
+from typing import Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 
 from .config import settings
+from .metrics import instrument_engine
 
 # Auto-create the parent directory for SQLite databases
+SQLITE_PATH: Optional[Path] = None
 if settings.database_url.startswith("sqlite:///"):
     # sqlite:///relative/path or sqlite:////absolute/path
     db_file = settings.database_url[len("sqlite:///"):]
-    if db_file:
-        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+    if db_file and db_file != ":memory:":
+        SQLITE_PATH = Path(db_file)
+        SQLITE_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},
+IS_SQLITE = settings.database_url.startswith("sqlite")
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    if SQLITE_PATH is not None:
+        cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA cache_size = {-int(settings.sqlite_cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA temp_store = {settings.sqlite_temp_store}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = 1")
+    cursor.close()
+
+
+# All writes go through a single connection, so they queue in the pool
+# instead of failing with "database is locked". Transactions start with
+# BEGIN IMMEDIATE to take the write lock up front (and, as a side effect,
+# make SAVEPOINTs work with pysqlite).
+if IS_SQLITE and SQLITE_PATH is not None:
+    engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.db_write_timeout_seconds,
+    )
+else:
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False} if IS_SQLITE else {})
+
+# Reads outside the event loop (e.g. the scanner) use a separate pool; under
+# WAL they read a committed snapshot and are never blocked by the writer.
+if IS_SQLITE and SQLITE_PATH is not None:
+    read_engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.db_read_pool_size,
+        max_overflow=settings.db_read_pool_size,
+    )
+else:
+    read_engine = engine
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _on_write_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _on_write_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    if read_engine is not engine:
+        @event.listens_for(read_engine, "connect")
+        def _on_read_connect(dbapi_connection, connection_record):
+            _apply_pragmas(dbapi_connection, read_only=True)
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Read-only API routes query through aiosqlite so they don't occupy the
+# Starlette threadpool (which streams and writes still need).
+async_read_engine = create_async_engine(
+    _async_url(settings.database_url),
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.db_read_pool_size,
+    max_overflow=settings.db_read_pool_size,
 )
 
+if IS_SQLITE:
+    @event.listens_for(async_read_engine.sync_engine, "connect")
+    def _on_async_read_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only=SQLITE_PATH is not None)
+
+instrument_engine(engine, "write")
+if read_engine is not engine:
+    instrument_engine(read_engine, "read")
+instrument_engine(async_read_engine.sync_engine, "async_read")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    """Route dependency: a read-only session. Routes write via ``run_write``;
+    background code opens ``SessionLocal``/``ReadSessionLocal`` itself."""
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def run_write(fn, *args):
+    """Run ``fn(session, *args)`` with a writer session on the threadpool.
+
+    Writes stay on the single synchronous writer connection; this keeps
+    them (and the wait for that connection) off the event loop.
+    """
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args)
+    return await run_in_threadpool(call)
+
+
+def _add_missing_columns():
+    """create_all never alters existing tables; add new (nullable) columns."""
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
 
 def create_tables():
     from . import models  # noqa: F401 - ensure models are registered
+    from .search import init_search_index
+    from .tag_counts import init_tag_counts
+    _add_missing_columns()
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        init_search_index(conn)
+        init_tag_counts(conn)
@@ -0,0 +1,78 @@
+"""HTTP validators: ETag / Last-Modified / If-Range handling."""
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import get_async_db
+from .library import get_library_version
+
+
+def _parse_http_date(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``If-None-Match`` against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def file_validators(size: int, mtime_ns: int) -> dict:
+    mtime = mtime_ns // 1_000_000_000
+    return {
+        "ETag": f'"{size:x}-{mtime_ns:x}"',
+        "Last-Modified": formatdate(mtime, usegmt=True),
+    }
+
+
+def is_not_modified(request: Request, etag: str, mtime: int) -> bool:
+    """``If-None-Match`` wins; ``If-Modified-Since`` is only used without it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and mtime <= since
+    return False
+
+
+def if_range_matches(request: Request, etag: str, mtime: int) -> bool:
+    """Whether a ``Range`` request may be served partially.
+
+    ``If-Range`` needs a strong ETag match or an exact Last-Modified date;
+    otherwise the full representation is sent.
+    """
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return _parse_http_date(if_range) == mtime
+
+
+def library_headers(version: int) -> dict:
+    return {"ETag": f'W/"lib-{version}"', "Cache-Control": "no-cache"}
+
+
+async def library_etag(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> int:
+    """Route dependency: answer 304 while the library version is unchanged.
+
+    Returns the version for routes that key their own caches on it.
+    """
+    version = await db.run_sync(get_library_version)
+    headers = library_headers(version)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return version
@@ -0,0 +1,24 @@
+"""Library version counter used to validate cached API responses.
+
+Every commit that changes what the list, detail or tag endpoints return
+(scans that touched rows, tag edits) bumps the version in the same
+transaction, so it is shared by all worker processes.
+"""
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import LibraryState
+
+
+def get_library_version(db: Session) -> int:
+    return db.execute(select(LibraryState.version).where(LibraryState.id == 1)).scalar() or 0
+
+
+def bump_library_version(db: Session) -> None:
+    table = LibraryState.__table__
+    db.execute(
+        sqlite_insert(table)
+        .values(id=1, version=1)
+        .on_conflict_do_update(index_elements=[table.c.id], set_={"version": table.c.version + 1})
+    )
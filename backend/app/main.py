@@ -1,14 +1,19 @@
 import logging
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
+from . import metrics
 from .config import settings
-from .database import create_tables
+from .database import async_read_engine, create_tables
 from .routers import admin, tags, videos
-from .scanner import scan_videos_async
+from .scan_jobs import scan_jobs
+from .tag_index import tag_index
+from .watcher import watcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,10 +22,18 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_tables()
+    if settings.tag_index_enabled:
+        tag_index.load()
     if settings.scan_on_startup:
-        logger.info("Running startup scan...")
-        await scan_videos_async()
+        # Serve the existing library while the scan catches up
+        job = scan_jobs.start()
+        logger.info(f"Startup scan running in the background (job {job.id})")
+    if settings.watch_library:
+        await watcher.start()
     yield
+    await watcher.stop()
+    await scan_jobs.stop()
+    await async_read_engine.dispose()
 
 
 app = FastAPI(title="Media Viewer", lifespan=lifespan)
@@ -32,6 +45,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        # Starlette's threadpool: calls waiting for one of its threads
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        metrics.executor_queue_depth.set(limiter.statistics().tasks_waiting, "threadpool")
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(videos.router, prefix="/api")
 app.include_router(tags.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
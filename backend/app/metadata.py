@@ -0,0 +1,206 @@
+"""Bounded-memory reader for yt-dlp info.json files.
+
+Info files carry multi-megabyte ``formats``/``thumbnails``/``automatic_captions``
+arrays that the viewer never uses. ``extract_fields`` walks the top-level
+object in fixed-size chunks, decodes only the requested keys and skips every
+other value without building it, so memory stays bounded by the chunk size
+plus the size of the kept values.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import IO, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Below this size a full decode is cheaper than streaming and still bounded.
+STREAM_MIN_SIZE = 1024 * 1024
+
+_WS = re.compile(rb"[ \t\r\n]*")
+# A complete JSON string, or a run of anything that is not a string or bracket.
+_CONTAINER_RUN = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(rb"[^,}\]\s]*")
+_QUOTE = ord('"')
+_OPENERS = (ord("{"), ord("["))
+
+
+def json_loads(data):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity, which yt-dlp can write and json accepts
+            pass
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+class _Scanner:
+    """Chunked cursor over a JSON byte stream."""
+
+    def __init__(self, f: IO[bytes]) -> None:
+        self.f = f
+        self.buf = b""
+        self.pos = 0
+        self.mark: Optional[int] = None
+
+    def _fill(self) -> bool:
+        keep = self.pos if self.mark is None else self.mark
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf) - keep))
+        if not chunk:
+            return False
+        self.buf = self.buf[keep:] + chunk
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark = 0
+        return True
+
+    def peek(self) -> bytes:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos:self.pos + 1]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON")
+
+    def expect(self, char: bytes) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char.decode()!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _match_complete(self, pattern: re.Pattern) -> None:
+        """Advance over ``pattern``, refilling until the match can't grow."""
+        while True:
+            m = pattern.match(self.buf, self.pos)
+            if m and m.end() < len(self.buf):
+                self.pos = m.end()
+                return
+            if not self._fill():
+                if m is None:
+                    raise ValueError("Unexpected end of JSON")
+                self.pos = m.end()
+                return
+
+    def skip_value(self) -> None:
+        first = self.peek()
+        if first == b'"':
+            self._match_complete(_STRING)
+        elif first in (b"{", b"["):
+            self.pos += 1
+            depth = 1
+            run = _CONTAINER_RUN.match
+            while depth:
+                pos = run(self.buf, self.pos).end()
+                if pos >= len(self.buf) or self.buf[pos] == _QUOTE:
+                    # Need more data, possibly to finish a split string
+                    self.pos = pos
+                    if not self._fill():
+                        raise ValueError("Unexpected end of JSON")
+                    continue
+                depth += 1 if self.buf[pos] in _OPENERS else -1
+                self.pos = pos + 1
+        else:
+            self._match_complete(_SCALAR)
+
+    def read_value(self):
+        self.peek()
+        self.mark = self.pos
+        try:
+            self.skip_value()
+            return json_loads(self.buf[self.mark:self.pos])
+        finally:
+            self.mark = None
+
+
+def extract_fields(f: IO[bytes], keys: Iterable[str]) -> dict:
+    """Decode only ``keys`` from the top-level JSON object in ``f``.
+
+    Reading stops as soon as every requested key has been seen.
+    """
+    wanted = set(keys)
+    out: dict = {}
+    sc = _Scanner(f)
+    sc.expect(b"{")
+    if sc.peek() == b"}":
+        return out
+    while wanted:
+        key = sc.read_value()
+        if not isinstance(key, str):
+            raise ValueError("Object key is not a string")
+        sc.expect(b":")
+        if key in wanted:
+            out[key] = sc.read_value()
+            wanted.discard(key)
+        else:
+            sc.skip_value()
+        sep = sc.peek()
+        sc.pos += 1
+        if sep == b"}":
+            break
+        if sep != b",":
+            raise ValueError(f"Expected ',' or '}}' at offset {sc.pos - 1}")
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Sidecar cache
+# ---------------------------------------------------------------------------
+
+def _sidecar_path(cache_dir: Path, folder_name: str) -> Path:
+    digest = hashlib.sha1(folder_name.encode("utf-8")).hexdigest()
+    return cache_dir / digest[:2] / f"{digest}.json"
+
+
+def read_metadata(json_path: Path, keys: Iterable[str], cache_dir: Optional[Path] = None) -> dict:
+    """Return the requested fields of an info.json, via the sidecar cache.
+
+    The slim extract is stored under ``cache_dir`` keyed by folder name and
+    validated against the info file's name, size and mtime (and the key
+    set), so a rescan of an unchanged file never opens it again.
+    """
+    keys = sorted(keys)
+    st = json_path.stat()
+    stamp = {"json_name": json_path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "keys": keys}
+    sidecar = _sidecar_path(cache_dir, json_path.parent.name) if cache_dir else None
+
+    if sidecar is not None:
+        try:
+            cached = json_loads(sidecar.read_bytes())
+            if cached.get("stamp") == stamp:
+                return cached["meta"]
+        except (OSError, ValueError):
+            pass
+
+    with open(json_path, "rb") as f:
+        if st.st_size < STREAM_MIN_SIZE:
+            full = json_loads(f.read())
+            if not isinstance(full, dict):
+                raise ValueError("info.json is not an object")
+            meta = {k: full[k] for k in keys if k in full}
+        else:
+            meta = extract_fields(f, keys)
+
+    if sidecar is not None:
+        try:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            tmp = sidecar.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(json_dumps({"stamp": stamp, "meta": meta}))
+            os.replace(tmp, sidecar)
+        except OSError as e:
+            logger.debug(f"Could not write metadata sidecar for {json_path}: {e}")
+    return meta
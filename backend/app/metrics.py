@@ -0,0 +1,287 @@
+"""Prometheus-style metrics (``METRICS_ENABLED``) and the slow-query log.
+
+A minimal registry rendered in the text exposition format at ``/metrics``,
+so scraping needs no extra dependency. Updates take one uncontended lock
+per metric; values that are cheap to read on demand (queue depths) are
+gauges evaluated at scrape time instead of being kept up to date.
+
+Per-request SQL counts and time are gathered through a context variable
+set by ``MetricsMiddleware``. It reaches the threadpool and aiosqlite's
+greenlets with the request context; scans run on their own executors
+without it, so their queries only count towards the per-engine totals.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SCAN_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _labels(self, labels: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._labels(labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; ``set_function`` reads it at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, "float | Callable[[], float]"] = {} if labelnames else {(): 0.0}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            current = self._values.get(labels, 0.0)
+            self._values[labels] = (current() if callable(current) else current) + amount
+
+    def dec(self, amount: float = 1.0, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def set_function(self, fn: Callable[[], float], *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = fn
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        for labels, value in values:
+            if callable(value):
+                try:
+                    value = value()
+                except Exception as e:
+                    logger.debug(f"Gauge {self.name}{labels} failed: {e}")
+                    continue
+            lines.append(f"{self.name}{self._labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (plus +Inf), sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+http_requests = Counter("http_requests_total", "HTTP requests by response status.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the response headers were sent.", ("method", "route"),
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("route",), QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per request.", ("route",),
+)
+db_queries = Counter("db_queries_total", "SQL statements executed.", ("engine",))
+db_query_duration = Counter("db_query_seconds_total", "Time spent executing SQL.", ("engine",))
+db_slow_queries = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS.", ("engine",))
+scan_phase_duration = Histogram(
+    "scan_phase_duration_seconds",
+    "Library scan phases: enumerate (listing), parse (summed worker time), "
+    "upsert (summed writer time) and reconcile.",
+    ("phase",),
+    SCAN_BUCKETS,
+)
+stream_bytes = Counter("stream_bytes_total", "Media bytes sent to clients.")
+active_streams = Gauge("active_streams", "Media responses currently being sent.")
+executor_queue_depth = Gauge("executor_queue_depth", "Work items waiting for a worker, per pool.", ("pool",))
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# [statement count, seconds] for the current request, if it is measured
+_request_sql: ContextVar[Optional[list]] = ContextVar("request_sql", default=None)
+
+
+def _truncate(text: str, limit: int = 1000) -> str:
+    return text if len(text) <= limit else text[:limit] + f"... ({len(text)} chars)"
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Count and time statements on ``engine`` (a sync ``Engine``; pass
+    ``.sync_engine`` for async ones) and log those over ``slow_query_ms``."""
+    enabled = settings.metrics_enabled
+    slow_seconds = settings.slow_query_ms / 1000
+    if not enabled and not slow_seconds:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if enabled:
+            db_queries.inc(1, name)
+            db_query_duration.inc(elapsed, name)
+            request = _request_sql.get()
+            if request is not None:
+                request[0] += 1
+                request[1] += elapsed
+        if slow_seconds and elapsed >= slow_seconds:
+            if enabled:
+                db_slow_queries.inc(1, name)
+            logger.warning(
+                f"Slow query on {name} ({elapsed * 1000:.1f} ms): {_truncate(statement)} "
+                f"parameters={_truncate(repr(parameters))}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # after_cursor_execute doesn't fire for failed statements
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    """Time requests per route template and attribute their SQL.
+
+    Routes are labelled by their path template (``/api/videos/{video_id}``)
+    so ids don't explode the label set; mounts by their path, and requests
+    that match nothing as ``unmatched``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: Optional[dict] = None
+
+    def _route(self, scope: Scope) -> str:
+        if self._routes is None:
+            routes = {}
+            for route in scope["app"].router.routes:
+                if isinstance(route, Mount):
+                    routes[route.app] = (route.path or "") + "/*"
+                elif hasattr(route, "endpoint"):
+                    routes[route.endpoint] = route.path
+            self._routes = routes
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        return self._routes.get(endpoint) or getattr(endpoint, "__name__", "other")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                http_request_duration.observe(time.perf_counter() - start, scope["method"], self._route(scope))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sql.reset(token)
+            route = self._route(scope)
+            http_requests.inc(1, scope["method"], route, str(status))
+            http_request_db_queries.observe(sql[0], route)
+            http_request_db_duration.observe(sql[1], route)
@@ -28,6 +28,13 @@ class Video(Base):
     extractor = Column(Text)
     post_timestamp = Column(Integer)
     epoch = Column(Integer)
+    # Resolved media file, recorded by the scanner so streams skip the glob
+    media_file = Column(Text)
+    media_size = Column(Integer)
+    media_mtime_ns = Column(Integer)
+    # Partial hash of the media file (see ``scanner._content_hash``); equal
+    # hashes mark duplicate downloads
+    content_hash = Column(Text)
     is_available = Column(Boolean, nullable=False, default=True)
     created_at = Column(Text, nullable=False, server_default=func.datetime("now"))
     updated_at = Column(Text, nullable=False, server_default=func.datetime("now"), onupdate=func.datetime("now"))
@@ -35,11 +42,19 @@ class Video(Base):
     tags = relationship("Tag", secondary="video_tags", back_populates="videos")
 
 
+def _fold_name(context) -> str:
+    return context.get_current_parameters()["name"].casefold()
+
+
 class Tag(Base):
     __tablename__ = "tags"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(Text, nullable=False, unique=True)
+    # Case-folded name so prefix search is an index range scan
+    name_folded = Column(Text, default=_fold_name)
+    # Available videos carrying this tag, maintained by ``tag_counts``
+    video_count = Column(Integer, default=0)
 
     videos = relationship("Video", secondary="video_tags", back_populates="tags")
 
@@ -51,8 +66,43 @@ class VideoTag(Base):
     tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
 
 
+class ScanState(Base):
+    """Per-folder fingerprint recorded by the scanner to skip unchanged folders."""
+    __tablename__ = "scan_state"
+
+    folder_name = Column(Text, primary_key=True)
+    dir_mtime_ns = Column(Integer, nullable=False)
+    mp4_name = Column(Text, nullable=False)
+    mp4_size = Column(Integer, nullable=False)
+    mp4_mtime_ns = Column(Integer, nullable=False)
+    json_name = Column(Text, nullable=False)
+    json_size = Column(Integer, nullable=False)
+    json_mtime_ns = Column(Integer, nullable=False)
+    # Reused while the mp4's name, size and mtime are unchanged
+    content_hash = Column(Text)
+
+
+class LibraryState(Base):
+    """Single row holding the library version (see ``library.py``)."""
+    __tablename__ = "library_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
 # Indexes
 Index("idx_videos_epoch", Video.epoch.desc())
+Index("idx_videos_available_epoch", Video.is_available, Video.epoch, Video.id)
 Index("idx_videos_available", Video.is_available)
+# Facet counts over the whole (available) library are index-only scans
+Index("idx_videos_available_uploader", Video.is_available, Video.uploader)
+Index("idx_videos_available_extractor", Video.is_available, Video.extractor)
+Index("idx_videos_available_duration", Video.is_available, Video.duration)
+# Covers duplicate groups and the collapse filter (rowid rides along)
+Index("idx_videos_content_hash", Video.content_hash, Video.is_available, Video.media_size)
 Index("idx_video_tags_video", VideoTag.video_id)
 Index("idx_video_tags_tag", VideoTag.tag_id)
+Index("idx_tags_name_nocase", Tag.name.collate("NOCASE"))
+# Covers autocomplete: prefix range plus the columns it sorts and returns
+Index("idx_tags_name_folded", Tag.name_folded, Tag.video_count, Tag.name)
+Index("idx_tags_video_count", Tag.video_count.desc(), Tag.name)
@@ -0,0 +1,110 @@
+"""Serialized JSON bodies of list responses and facet counts
+(``RESPONSE_CACHE_ENABLED``).
+
+Entries are tagged with the library version they were built from. Scans
+that change rows and tag edits bump that version in the same transaction,
+so the first request that sees a newer version drops every entry; nothing
+stale is served and nothing else has to call into the cache. The TTL only
+bounds how long an entry holds memory.
+
+The facet cache is the exception: a scan bumps the version with every
+batch, and filtered facets can take seconds to count, so its entries
+stay usable for ``FACET_CACHE_STALE_SECONDS`` after they were built even
+once the version has moved on. ``lookup`` tells callers which they got.
+
+The cache is only touched from the event loop, so it needs no lock.
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from .config import settings
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, stale_seconds: float = 0.0) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        # key -> (body, expires, version, built)
+        self._entries: "OrderedDict[Hashable, tuple[bytes, float, int, float]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync_version(self, version: int) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            if not self.stale_seconds:
+                self.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        found = self.lookup(key, version)
+        return found[0] if found is not None else None
+
+    def lookup(self, key: Hashable, version: int) -> Optional[tuple[bytes, bool]]:
+        """``(body, current)``: ``current`` is False for an entry built from
+        an older version but still within ``stale_seconds``."""
+        self._sync_version(version)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            body, expires, built_version, built = entry
+            current = built_version == version
+            if expires > now and (current or now - built <= self.stale_seconds):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body, current
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, version: int, body: bytes) -> None:
+        self._sync_version(version)
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        now = time.monotonic()
+        self._entries[key] = (body, now + self.ttl_seconds, version, now)
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable) -> None:
+        body = self._entries.pop(key)[0]
+        self._bytes -= len(body)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def status(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+video_list_cache = ResponseCache(
+    settings.response_cache_max_entries,
+    settings.response_cache_max_bytes,
+    settings.response_cache_ttl_seconds,
+)
+# Keyed on the filters alone, so every page of a listing shares them
+facet_cache = ResponseCache(
+    settings.response_cache_max_entries,
+    settings.response_cache_max_bytes,
+    settings.response_cache_ttl_seconds,
+    settings.facet_cache_stale_seconds,
+)
@@ -1,20 +1,81 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud
-from ..database import get_db
-from ..scanner import scan_videos_async
-from ..schemas import AdminStatus, ScanResult
+from ..config import settings
+from ..database import get_async_db
+from ..response_cache import facet_cache, video_list_cache
+from ..scan_jobs import scan_jobs
+from ..schemas import AdminStatus, ScanJobStatus
+from ..tag_index import tag_index
+from ..watcher import watcher
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-@router.post("/rescan", response_model=ScanResult)
-async def rescan():
-    result = await scan_videos_async()
-    return ScanResult(**result)
+@router.post(
+    "/rescan",
+    response_model=ScanJobStatus,
+    status_code=202,
+    responses={
+        200: {"model": ScanJobStatus, "description": "The finished scan (with wait=true)"},
+        409: {"model": ScanJobStatus, "description": "A non-full scan is running"},
+    },
+)
+async def rescan(response: Response, full: bool = False, wait: bool = False):
+    """Start a scan (or join the running one) and return its job: 202.
+
+    A full scan can't join a running non-full one; that is a 409 with the
+    running job, to be retried once it has finished. With ``wait``,
+    respond only once the scan has finished, with 200 and its result.
+    """
+    current = scan_jobs.current
+    if full and current is not None and not current.full:
+        return JSONResponse(jsonable_encoder(ScanJobStatus(**current.status_dict())), status_code=409)
+    job = scan_jobs.start(full=full)
+    if wait:
+        # Shielded: a client disconnect must not cancel the scan itself
+        await asyncio.shield(job.task)
+        response.status_code = 200
+    return ScanJobStatus(**job.status_dict())
+
+
+@router.get("/scans", response_model=list[ScanJobStatus])
+async def list_scans():
+    return [ScanJobStatus(**job.status_dict()) for job in scan_jobs.jobs()]
+
+
+@router.get("/scans/{job_id}", response_model=ScanJobStatus)
+async def get_scan(job_id: str):
+    job = scan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return ScanJobStatus(**job.status_dict())
+
+
+@router.post("/scans/{job_id}/cancel", response_model=ScanJobStatus)
+async def cancel_scan(job_id: str):
+    job = scan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    scan_jobs.cancel(job)
+    return ScanJobStatus(**job.status_dict())
 
 
 @router.get("/status", response_model=AdminStatus)
-def status(db: Session = Depends(get_db)):
-    return AdminStatus(**crud.get_status(db))
+async def status(db: AsyncSession = Depends(get_async_db)):
+    result = await db.run_sync(crud.get_status)
+    if watcher.running:
+        result["watcher"] = watcher.status()
+    if tag_index.ready:
+        result["tag_index"] = tag_index.status()
+    if settings.response_cache_enabled:
+        result["response_cache"] = video_list_cache.status()
+        result["facet_cache"] = facet_cache.status()
+    if scan_jobs.latest is not None:
+        result["scan"] = scan_jobs.latest.status_dict()
+    return AdminStatus(**result)
@@ -1,19 +1,26 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud
-from ..database import get_db
+from ..database import get_async_db
+from ..http_cache import library_etag
 from ..schemas import TagOut
+from ..tag_index import tag_index
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
 @router.get("", response_model=list[TagOut])
-def list_tags(
+async def list_tags(
     q: Optional[str] = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    version: int = Depends(library_etag),
 ):
-    return crud.get_tags(db, q=q, limit=limit)
+    # The in-memory index answers without querying tags (the ETag still
+    # needs the library version, so unchanged results are a 304 either way)
+    if tag_index.ready:
+        return tag_index.search(q, limit)
+    return await db.run_sync(crud.get_tags, q, limit)
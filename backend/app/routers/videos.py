@@ -1,167 +1,195 @@
-import asyncio
-from pathlib import Path
-from typing import AsyncGenerator, Literal, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-
-from .. import crud
-from ..database import get_db
-from ..schemas import TagAddRequest, VideoDetail, VideoListResponse, VideoSummary
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, thumbnails
+from ..config import settings
+from ..database import get_async_db, run_write
+from ..http_cache import etag_matches, file_validators, if_range_matches, is_not_modified, library_etag, library_headers
+from ..library import get_library_version
+from ..metadata import json_dumps, json_loads
+from ..response_cache import facet_cache, video_list_cache
+from ..schemas import DuplicateGroupsResponse, TagAddRequest, VideoDetail, VideoListResponse
+from ..serialization import video_detail_json, video_list_json
+from ..streaming import MediaFileResponse
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
-CHUNK_SIZE = 64 * 1024  # 64 KB
-
-
-def _video_summary(video, db: Session) -> VideoSummary:
-    return VideoSummary(
-        id=video.id,
-        folder_name=video.folder_name,
-        title=video.title,
-        uploader=video.uploader,
-        uploader_url=video.uploader_url,
-        webpage_url=video.webpage_url,
-        thumbnail=video.thumbnail,
-        duration=video.duration,
-        width=video.width,
-        height=video.height,
-        aspect_ratio=video.aspect_ratio,
-        like_count=video.like_count,
-        repost_count=video.repost_count,
-        comment_count=video.comment_count,
-        extractor=video.extractor,
-        post_timestamp=video.post_timestamp,
-        epoch=video.epoch,
-        is_available=video.is_available,
-        tags=[t.name for t in video.tags],
-    )
-
-
 @router.get("", response_model=VideoListResponse)
-def list_videos(
+async def list_videos(
     page: int = Query(1, ge=1),
     page_size: int = Query(24, ge=1, le=200),
     sort: Literal["epoch_desc", "epoch_asc"] = "epoch_desc",
     tags: list[str] = Query(default=[]),
+    any_tags: list[str] = Query(default=[]),
+    exclude_tags: list[str] = Query(default=[]),
     available_only: bool = True,
-    db: Session = Depends(get_db),
+    q: Optional[str] = Query(default=None, max_length=200),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    collapse_duplicates: bool = False,
+    facets: list[Literal["uploader", "extractor", "duration", "tags"]] = Query(default=[]),
+    facet_limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    version: int = Depends(library_etag),
 ):
-    items, total = crud.get_videos(
-        db,
-        page=page,
-        page_size=page_size,
-        sort=sort,
-        tags=tags or None,
+    # Filters are sets; their order in the query string doesn't matter.
+    # Facets depend on the filters only, not on the page.
+    facet_key = (
+        tuple(sorted(set(tags))), tuple(sorted(set(any_tags))), tuple(sorted(set(exclude_tags))),
+        available_only, q, collapse_duplicates, tuple(sorted(set(facets))), facet_limit,
+    )
+    if settings.response_cache_enabled:
+        key = (page, page_size, sort, cursor, include_total, *facet_key)
+        body = video_list_cache.get(key, version)
+        if body is not None:
+            return Response(body, media_type="application/json", headers=library_headers(version))
+
+    try:
+        items, total, next_cursor = await db.run_sync(
+            crud.get_videos,
+            page=page,
+            page_size=page_size,
+            sort=sort,
+            tags=tags or None,
+            any_tags=any_tags or None,
+            exclude_tags=exclude_tags or None,
+            available_only=available_only,
+            cursor=cursor,
+            with_total=include_total,
+            text_query=q,
+            collapse_duplicates=collapse_duplicates,
+        )
+        # Reads run in autocommit mode, so the page may already include a
+        # write committed after the version was read
+        page_current = await db.run_sync(get_library_version) == version
+        facet_counts, facets_current = await _facets(db, version, facet_key) if facets else (None, True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = video_list_json(items, total, page, page_size, next_cursor, facet_counts)
+    if not (page_current and facets_current):
+        # Not what this version's ETag stands for; don't let it be reused
+        return Response(body, media_type="application/json", headers={"Cache-Control": "no-store"})
+    if settings.response_cache_enabled:
+        video_list_cache.put(key, version, body)
+    return Response(body, media_type="application/json", headers=library_headers(version))
+
+
+async def _facets(db: AsyncSession, version: int, key: tuple) -> tuple[dict, bool]:
+    """Facet counts for ``key`` (filters, facet names, limit), cached per
+    library version independently of the page, and whether they are
+    current. Counts a few seconds behind the version may be served while
+    it keeps changing (``FACET_CACHE_STALE_SECONDS``); counts that may
+    include a later write are neither current nor cached."""
+    if settings.response_cache_enabled:
+        cached = facet_cache.lookup(key, version)
+        if cached is not None:
+            body, current = cached
+            return json_loads(body), current
+    tags, any_tags, exclude_tags, available_only, q, collapse_duplicates, facets, limit = key
+    result = await db.run_sync(
+        crud.get_facets,
+        list(facets),
+        limit,
+        tags=list(tags) or None,
+        any_tags=list(any_tags) or None,
+        exclude_tags=list(exclude_tags) or None,
         available_only=available_only,
+        text_query=q,
+        collapse_duplicates=collapse_duplicates,
     )
-    return VideoListResponse(
-        items=[_video_summary(v, db) for v in items],
-        total=total,
-        page=page,
-        page_size=page_size,
-        has_next=(page * page_size) < total,
+    current = await db.run_sync(get_library_version) == version
+    if current and settings.response_cache_enabled:
+        facet_cache.put(key, version, json_dumps(result))
+    return result, current
+
+
+# Declared before /{video_id} so "duplicates" isn't taken for an id
+@router.get("/duplicates", response_model=DuplicateGroupsResponse)
+async def list_duplicates(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    version: int = Depends(library_etag),
+):
+    """Groups of available videos whose media files have the same content hash."""
+    groups, total = await db.run_sync(crud.get_duplicate_groups, page, page_size)
+    return DuplicateGroupsResponse(
+        groups=groups, total=total, page=page, page_size=page_size, has_next=page * page_size < total,
     )
 
 
 @router.get("/{video_id}", response_model=VideoDetail)
-def get_video(video_id: str, db: Session = Depends(get_db)):
-    video = crud.get_video(db, video_id)
-    if not video:
+async def get_video(
+    video_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    version: int = Depends(library_etag),
+):
+    detail = await db.run_sync(crud.get_video_detail, video_id)
+    if not detail:
         raise HTTPException(status_code=404, detail="Video not found")
-    summary = _video_summary(video, db)
-    return VideoDetail(**summary.model_dump(), description=video.description)
-
-
-def _parse_range(range_header: str, file_size: int) -> tuple[int, int]:
-    """Parse 'bytes=START-END' header. Returns (start, end) inclusive."""
-    try:
-        unit, rng = range_header.split("=", 1)
-        if unit.strip() != "bytes":
-            raise ValueError
-        start_str, _, end_str = rng.partition("-")
-        start = int(start_str) if start_str else 0
-        end = int(end_str) if end_str else file_size - 1
-        end = min(end, file_size - 1)
-        return start, end
-    except Exception:
-        return 0, file_size - 1
-
-
-async def _stream_file(path: Path, start: int, end: int) -> AsyncGenerator[bytes, None]:
-    loop = asyncio.get_event_loop()
-
-    def _read_chunk(f, size):
-        return f.read(size)
-
-    with open(path, "rb") as f:
-        f.seek(start)
-        remaining = end - start + 1
-        while remaining > 0:
-            chunk_size = min(CHUNK_SIZE, remaining)
-            chunk = await loop.run_in_executor(None, _read_chunk, f, chunk_size)
-            if not chunk:
-                break
-            remaining -= len(chunk)
-            yield chunk
+    return Response(video_detail_json(detail), media_type="application/json", headers=library_headers(version))
 
 
 @router.get("/{video_id}/stream")
-async def stream_video(video_id: str, request: Request, db: Session = Depends(get_db)):
-    video = crud.get_video(db, video_id)
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
-
-    file_path = crud.resolve_video_file(video)
-    if not file_path or not file_path.exists():
+async def stream_video(video_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    media = await db.run_sync(crud.resolve_media, video_id)
+    if media is None:
+        if not await db.run_sync(crud.get_video, video_id):
+            raise HTTPException(status_code=404, detail="Video not found")
         raise HTTPException(status_code=404, detail="Video file not found on disk")
 
-    file_size = file_path.stat().st_size
+    headers = {
+        **file_validators(media.size, media.mtime_ns),
+        "Cache-Control": f"public, max-age={settings.stream_max_age}",
+    }
+    mtime = media.mtime_ns // 1_000_000_000
+    if is_not_modified(request, headers["ETag"], mtime):
+        return Response(status_code=304, headers=headers)
+
     range_header = request.headers.get("Range")
+    if range_header and not if_range_matches(request, headers["ETag"], mtime):
+        range_header = None
+    return MediaFileResponse(media.path, media.size, range_header, headers=headers)
 
-    if range_header:
-        start, end = _parse_range(range_header, file_size)
-        content_length = end - start + 1
-        headers = {
-            "Content-Range": f"bytes {start}-{end}/{file_size}",
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(content_length),
-            "Content-Type": "video/mp4",
-        }
-        return StreamingResponse(
-            _stream_file(file_path, start, end),
-            status_code=206,
-            headers=headers,
-        )
 
-    headers = {
-        "Accept-Ranges": "bytes",
-        "Content-Length": str(file_size),
-        "Content-Type": "video/mp4",
-    }
-    return StreamingResponse(
-        _stream_file(file_path, 0, file_size - 1),
-        status_code=200,
-        headers=headers,
-    )
+@router.get("/{video_id}/thumbnail")
+async def video_thumbnail(
+    video_id: str,
+    request: Request,
+    w: int = Query(thumbnails.DEFAULT_WIDTH, ge=1, le=4096),
+    db: AsyncSession = Depends(get_async_db),
+):
+    media = await db.run_sync(crud.resolve_media, video_id)
+    if media is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    thumb = await thumbnails.get_thumbnail(media.path, w)
+    if thumb is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+
+    headers = {"ETag": f'"{thumb.etag}"', "Cache-Control": f"public, max-age={settings.thumbnail_max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(thumb.path, media_type=thumb.media_type, headers=headers)
 
 
 @router.post("/{video_id}/tags")
-def add_tag(video_id: str, body: TagAddRequest, db: Session = Depends(get_db)):
-    video = crud.get_video(db, video_id)
+async def add_tag(video_id: str, body: TagAddRequest, db: AsyncSession = Depends(get_async_db)):
+    video = await db.run_sync(crud.get_video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     if not body.name.strip():
         raise HTTPException(status_code=422, detail="Tag name cannot be empty")
-    tags = crud.add_tag_to_video(db, video_id, body.name)
+    tags = await run_write(crud.add_tag_to_video, video_id, body.name)
     return {"tags": tags}
 
 
 @router.delete("/{video_id}/tags/{tag_id}")
-def remove_tag(video_id: str, tag_id: int, db: Session = Depends(get_db)):
-    video = crud.get_video(db, video_id)
+async def remove_tag(video_id: str, tag_id: int, db: AsyncSession = Depends(get_async_db)):
+    video = await db.run_sync(crud.get_video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    tags = crud.remove_tag_from_video(db, video_id, tag_id)
+    tags = await run_write(crud.remove_tag_from_video, video_id, tag_id)
     return {"tags": tags}
@@ -0,0 +1,132 @@
+"""Library scans as background jobs.
+
+``POST /api/admin/rescan`` and startup only start a job and return its id;
+the scan itself runs on the executor like before, committing batch by
+batch, so the API keeps serving the existing library meanwhile. Jobs
+report progress and can be cancelled. At most one runs at a time.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from .scanner import ScanProgress, scan_videos_async
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for GET /api/admin/scans
+_HISTORY = 20
+
+
+class ScanJob:
+    def __init__(self, full: bool) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.full = full
+        self.status = "running"  # -> completed | cancelled | failed
+        self.progress = ScanProgress()
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._start = time.monotonic()
+        self._elapsed: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def finish(self, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        self.status = status
+        self.result = result
+        self.error = error
+        self.progress.phase = "done"
+        self.finished_at = datetime.now(timezone.utc)
+        self._elapsed = time.monotonic() - self._start
+
+    def status_dict(self) -> dict:
+        progress = self.progress
+        elapsed = self._elapsed if self._elapsed is not None else time.monotonic() - self._start
+        rate = eta = None
+        if progress.scan_started is not None and progress.folders_done:
+            scanning = (self._start + elapsed) - progress.scan_started
+            if scanning > 0:
+                rate = progress.folders_done / scanning
+                if not self.done and progress.folders_total is not None:
+                    eta = max(progress.folders_total - progress.folders_done, 0) / rate
+        return {
+            "id": self.id,
+            "full": self.full,
+            "status": self.status,
+            "phase": progress.phase,
+            "folders_total": progress.folders_total,
+            "folders_done": progress.folders_done,
+            "rate_per_second": round(rate, 1) if rate is not None else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(elapsed, 3),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ScanJobs:
+    def __init__(self) -> None:
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+
+    @property
+    def current(self) -> Optional[ScanJob]:
+        """The running job, if any."""
+        latest = self.latest
+        return latest if latest is not None and not latest.done else None
+
+    @property
+    def latest(self) -> Optional[ScanJob]:
+        return next(reversed(self._jobs.values()), None)
+
+    def start(self, full: bool = False) -> ScanJob:
+        """Start a scan, or return the one already running."""
+        current = self.current
+        if current is not None:
+            return current
+        job = ScanJob(full)
+        self._jobs[job.id] = job
+        while len(self._jobs) > _HISTORY:
+            self._jobs.popitem(last=False)
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: ScanJob) -> None:
+        try:
+            result = await scan_videos_async(job.full, job.progress)
+        except Exception as e:
+            logger.exception(f"Scan {job.id} failed")
+            job.finish("failed", error=str(e))
+        else:
+            job.finish("cancelled" if result.get("cancelled") else "completed", result=result)
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[ScanJob]:
+        """Newest first."""
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job: ScanJob) -> None:
+        if not job.done:
+            logger.info(f"Cancelling scan {job.id}")
+            job.progress.cancelled = True
+
+    async def stop(self) -> None:
+        """Cancel the running job and wait for it to commit what it has."""
+        job = self.current
+        if job is not None:
+            self.cancel(job)
+            await asyncio.gather(job.task, return_exceptions=True)
+
+
+scan_jobs = ScanJobs()
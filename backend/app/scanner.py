@@ -1,23 +1,51 @@
 import asyncio
-import json
+import hashlib
 import logging
+import os
+import string
 import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
+from sqlalchemy import bindparam, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from . import metrics, search, tag_counts
 from .config import settings
-from .database import SessionLocal
-from .models import Tag, Video, VideoTag
+from .database import SQLITE_PATH, ReadSessionLocal, SessionLocal
+from .library import bump_library_version
+from .metadata import read_metadata
+from .models import ScanState, Tag, Video, VideoTag
+from .tag_index import tag_index
 
 logger = logging.getLogger(__name__)
 
 _scan_lock = asyncio.Lock()
 
 
+class ScanProgress:
+    """Counters a running scan updates, and a flag asking it to stop.
+
+    Written from the scan thread and read from the event loop; each field
+    is replaced whole, so readers never see a torn value.
+    """
+
+    def __init__(self) -> None:
+        self.phase = "waiting"  # -> listing -> scanning -> finishing -> done
+        self.folders_total: Optional[int] = None
+        self.folders_done = 0
+        self.scan_started: Optional[float] = None  # monotonic, when folders start flowing
+        self.cancelled = False
+
+
 def _get_or_create_tag(db: Session, name: str) -> Tag:
     name = name.strip()
-    tag = db.query(Tag).filter(Tag.name.ilike(name)).first()
+    tag = db.query(Tag).filter(Tag.name.collate("NOCASE") == name).first()
     if not tag:
         tag = Tag(name=name)
         db.add(tag)
@@ -25,27 +53,115 @@ def _get_or_create_tag(db: Session, name: str) -> Tag:
     return tag
 
 
-def _add_tag_to_video(db: Session, video_id: str, tag_name: str) -> None:
+def _add_tag_to_video(db: Session, video_id: str, tag_name: str) -> Optional[int]:
+    """Link the tag, creating it if needed. Returns its id if newly linked."""
     tag = _get_or_create_tag(db, tag_name)
     exists = db.query(VideoTag).filter_by(video_id=video_id, tag_id=tag.id).first()
-    if not exists:
-        db.add(VideoTag(video_id=video_id, tag_id=tag.id))
+    if exists:
+        return None
+    db.add(VideoTag(video_id=video_id, tag_id=tag.id))
+    return tag.id
+
+
+# Top-level info.json keys read by ``_video_row``; everything else is skipped.
+METADATA_KEYS = frozenset({
+    "id", "display_id", "fulltitle", "title", "description", "uploader",
+    "uploader_url", "webpage_url", "thumbnail", "duration", "width", "height",
+    "aspect_ratio", "like_count", "repost_count", "comment_count", "extractor",
+    "timestamp", "epoch", "tags",
+})
+
+
+def _metadata_cache_dir() -> Optional[Path]:
+    if settings.metadata_cache_dir:
+        return Path(settings.metadata_cache_dir)
+    if SQLITE_PATH is not None:
+        return SQLITE_PATH.parent / "metadata-cache"
+    return None
 
 
 def _parse_metadata(json_path: Path) -> dict:
-    with open(json_path, encoding="utf-8") as f:
-        return json.load(f)
+    return read_metadata(json_path, METADATA_KEYS, _metadata_cache_dir())
 
 
-def _upsert_video(db: Session, folder_name: str, meta: dict) -> tuple[bool, bool]:
-    """Returns (is_new, was_updated)."""
+def _fingerprint(subdir: Path, mp4_path: Path, json_path: Path) -> dict:
+    dir_stat = subdir.stat()
+    mp4_stat = mp4_path.stat()
+    json_stat = json_path.stat()
+    return {
+        "folder_name": subdir.name,
+        "dir_mtime_ns": dir_stat.st_mtime_ns,
+        "mp4_name": mp4_path.name,
+        "mp4_size": mp4_stat.st_size,
+        "mp4_mtime_ns": mp4_stat.st_mtime_ns,
+        "json_name": json_path.name,
+        "json_size": json_stat.st_size,
+        "json_mtime_ns": json_stat.st_mtime_ns,
+    }
+
+
+CONTENT_HASH_BLOCK_SIZE = 64 * 1024
+
+
+def _content_hash(path: Path, size: int) -> str:
+    """Hash of ``size`` and the first, middle and last blocks of ``path``.
+
+    At most three blocks are read however big the file is. Files that
+    differ only outside those blocks hash the same, which doesn't happen
+    for real video files.
+    """
+    digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    block = CONTENT_HASH_BLOCK_SIZE
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if size <= 3 * block:
+            digest.update(os.pread(fd, size, 0))
+        else:
+            for offset in (0, (size - block) // 2, size - block):
+                digest.update(os.pread(fd, block, offset))
+    finally:
+        os.close(fd)
+    return digest.hexdigest()
+
+
+def _media_hash(subdir: Path, fingerprint: dict, state: Optional[dict]) -> str:
+    """The mp4's content hash, reused from ``state`` if the file is unchanged."""
+    if state is not None and state.get("content_hash") and all(
+        state[key] == fingerprint[key] for key in ("mp4_name", "mp4_size", "mp4_mtime_ns")
+    ):
+        return state["content_hash"]
+    return _content_hash(subdir / fingerprint["mp4_name"], fingerprint["mp4_size"])
+
+
+def _is_unchanged(subdir: Path, dir_mtime_ns: int, state: Optional[dict]) -> bool:
+    """True if the folder still matches its recorded fingerprint.
+
+    Only ``stat`` calls are made: a changed directory mtime means files were
+    added, removed or renamed, and the size/mtime of the recorded mp4/json
+    catch in-place rewrites.
+    """
+    if state is None or state["dir_mtime_ns"] != dir_mtime_ns:
+        return False
+    for name, size, mtime_ns in (
+        (state["mp4_name"], state["mp4_size"], state["mp4_mtime_ns"]),
+        (state["json_name"], state["json_size"], state["json_mtime_ns"]),
+    ):
+        try:
+            st = (subdir / name).stat()
+        except OSError:
+            return False
+        if st.st_size != size or st.st_mtime_ns != mtime_ns:
+            return False
+    return True
+
+
+def _video_row(folder_name: str, meta: dict) -> dict:
+    """Map yt-dlp metadata onto a ``videos`` row."""
     video_id = meta.get("id") or meta.get("display_id")
     if not video_id:
         raise ValueError("No id field in metadata")
 
-    existing = db.query(Video).filter_by(id=video_id).first()
-
-    data = {
+    return {
         "id": video_id,
         "folder_name": folder_name,
         "title": meta.get("fulltitle") or meta.get("title"),
@@ -67,77 +183,437 @@ def _upsert_video(db: Session, folder_name: str, meta: dict) -> tuple[bool, bool
         "is_available": True,
     }
 
-    if existing:
-        # Update fields but don't touch tags (preserve user tags)
-        for k, v in data.items():
-            if k != "id":
-                setattr(existing, k, v)
-        db.flush()
-        return False, True
-    else:
-        video = Video(**data)
-        db.add(video)
-        db.flush()
 
-        # Import source-platform tags on first insert only
-        source_tags = meta.get("tags") or []
-        for tag_name in source_tags:
-            if tag_name and tag_name.strip():
-                _add_tag_to_video(db, video_id, tag_name)
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _nocase(name: str) -> str:
+    """Fold ``name`` the way SQLite's NOCASE collation does: ASCII only."""
+    return name.translate(_NOCASE)
+
+
+class _TagCache:
+    """NOCASE-folded tag name → id map shared by all batches of one scan."""
+
+    def __init__(self) -> None:
+        self._ids: Optional[dict[str, int]] = None
+
+    def reset(self) -> None:
+        self._ids = None
+
+    def resolve(self, db: Session, names: list[str]) -> dict[str, int]:
+        """Return ``{_nocase(name): tag id}``, creating missing tags.
+
+        Names are matched like ``_get_or_create_tag`` and the tag filters
+        do (NOCASE), so "Music" and "music" share a tag but "Straße" and
+        "STRASSE" don't.
+        """
+        if self._ids is None:
+            self._ids = {}
+            for tag_id, name in db.execute(select(Tag.id, Tag.name).order_by(Tag.id)):
+                self._ids.setdefault(_nocase(name), tag_id)
+        missing = {}
+        for name in names:
+            key = _nocase(name)
+            if key not in self._ids:
+                missing.setdefault(key, name)
+        if missing:
+            new_names = list(missing.values())
+            db.execute(sqlite_insert(Tag.__table__).on_conflict_do_nothing(), [{"name": n} for n in new_names])
+            for tag_id, name in db.execute(select(Tag.id, Tag.name).where(Tag.name.in_(new_names))):
+                self._ids.setdefault(_nocase(name), tag_id)
+        return self._ids
+
+
+_VIDEO_UPDATE_COLUMNS = [c.name for c in Video.__table__.columns if c.name not in ("id", "created_at", "updated_at")]
+
+
+def _bulk_upsert(db: Session, results: list[dict], tag_cache: _TagCache) -> list[bool]:
+    """Upsert a batch of parsed folders. Returns is_new per result.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE`` covers the videos, another the
+    scan fingerprints. Source-platform tags are linked on first insert only,
+    so user tag edits survive rescans.
+    """
+    rows = [r["row"] for r in results]
+    ids = [row["id"] for row in rows]
+    was_available = dict(db.execute(select(Video.id, Video.is_available).where(Video.id.in_(ids))).all())
+    is_new = []
+    for video_id in ids:
+        is_new.append(video_id not in was_available)
+        was_available.setdefault(video_id, None)
+    # New videos and ones that reappeared now count towards their tags
+    now_available = [video_id for video_id, available in was_available.items() if not available]
+
+    stmt = sqlite_insert(Video.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Video.id],
+        set_={**{c: stmt.excluded[c] for c in _VIDEO_UPDATE_COLUMNS}, "updated_at": func.datetime("now")},
+    )
+    db.execute(stmt, rows)
+
+    stmt = sqlite_insert(ScanState.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ScanState.folder_name],
+        set_={c.name: stmt.excluded[c.name] for c in ScanState.__table__.columns if not c.primary_key},
+    )
+    db.execute(stmt, [r["fingerprint"] for r in results])
+
+    # Import source-platform tags on first insert only
+    new_tags = [(r["row"]["id"], r["tags"]) for r, new in zip(results, is_new) if new and r["tags"]]
+    if new_tags:
+        tag_ids = tag_cache.resolve(db, [name for _, names in new_tags for name in names])
+        links = {
+            (video_id, tag_ids[_nocase(name)])
+            for video_id, names in new_tags
+            for name in names
+        }
+        db.execute(
+            insert(VideoTag.__table__).prefix_with("OR IGNORE"),
+            [{"video_id": video_id, "tag_id": tag_id} for video_id, tag_id in links],
+        )
+    tag_counts.adjust_for_videos(db, now_available, +1)
+    search.reindex_videos(db, ids)
+    return is_new
+
+
+def _scan_folder(path: str, state: Optional[dict], full: bool) -> dict:
+    """Enumerate and parse one folder. Runs in the scan worker pool.
+
+    Touches no database state so it is safe in threads or processes; the
+    result is applied by the single writer in ``scan_videos``.
+    """
+    started = time.perf_counter()
+    subdir = Path(path)
+    result = {"folder_name": subdir.name, "status": "ok"}
+    try:
+        dir_mtime_ns = subdir.stat().st_mtime_ns
+        if not full and _is_unchanged(subdir, dir_mtime_ns, state):
+            result["status"] = "skipped"
+            if settings.scan_content_hash and state.get("content_hash") is None:
+                # Scanned before content hashes existed
+                result["content_hash"] = _content_hash(subdir / state["mp4_name"], state["mp4_size"])
+            return result
+
+        mp4_files = list(subdir.glob("*.mp4"))
+        json_files = list(subdir.glob("*.json"))
+        if not mp4_files or not json_files:
+            result["status"] = "incomplete"
+            result["error"] = "no .mp4 found" if not mp4_files else "no .json found"
+            return result
+
+        fingerprint = _fingerprint(subdir, mp4_files[0], json_files[0])
+        meta = _parse_metadata(json_files[0])
+        fingerprint["content_hash"] = _media_hash(subdir, fingerprint, state) if settings.scan_content_hash else None
+        result["fingerprint"] = fingerprint
+        result["row"] = {
+            **_video_row(subdir.name, meta),
+            "media_file": fingerprint["mp4_name"],
+            "media_size": fingerprint["mp4_size"],
+            "media_mtime_ns": fingerprint["mp4_mtime_ns"],
+            "content_hash": fingerprint["content_hash"],
+        }
+        result["tags"] = [t.strip() for t in meta.get("tags") or [] if t and t.strip()]
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _make_executor() -> Executor:
+    workers = settings.scan_workers or os.cpu_count() or 4
+    if settings.scan_use_processes:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+
+
+def _apply_batch(db: Session, batch: list[dict], stats: dict, unseen: set[str], tag_cache: _TagCache) -> None:
+    """Writer stage: bulk-apply parsed folders, isolating failures per folder.
+
+    Folders that fail are added to ``unseen``."""
+    try:
+        with db.begin_nested():
+            outcomes = [(r, new) for r, new in zip(batch, _bulk_upsert(db, batch, tag_cache))]
+    except Exception:
+        # Tags created inside the rolled-back savepoint are gone; retry one
+        # folder at a time so a single bad row only drops itself.
+        tag_cache.reset()
+        outcomes = []
+        for result in batch:
+            try:
+                with db.begin_nested():
+                    outcomes.append((result, _bulk_upsert(db, [result], tag_cache)[0]))
+            except Exception as e:
+                tag_cache.reset()
+                unseen.add(result["folder_name"])
+                logger.warning(f"Error processing {result['folder_name']}: {e}")
+
+    for result, is_new in outcomes:
+        if is_new:
+            stats["added"] += 1
+        else:
+            stats["updated"] += 1
+    if outcomes:
+        bump_library_version(db)
+    # Commit per batch so the shared writer connection is released and tag
+    # edits don't wait for the whole scan
+    db.commit()
+    tag_index.refresh_for_videos([result["row"]["id"] for result, _ in outcomes])
+
+
+def _apply_hashes(db: Session, hashed: list[dict]) -> None:
+    """Store content hashes computed for otherwise unchanged folders."""
+    db.execute(
+        update(Video.__table__).where(Video.__table__.c.folder_name == bindparam("folder"))
+        .values(content_hash=bindparam("hash")),
+        hashed,
+    )
+    db.execute(
+        update(ScanState.__table__).where(ScanState.__table__.c.folder_name == bindparam("folder"))
+        .values(content_hash=bindparam("hash")),
+        hashed,
+    )
+    bump_library_version(db)
+    db.commit()
+
+
+def _run_pipeline(
+    db: Session, paths: Iterable[str], full: bool, stats: dict, unseen: set[str],
+    progress: Optional[ScanProgress] = None, phase_seconds: Optional[dict] = None,
+) -> set[str]:
+    """Feed ``paths`` through the worker pool into the batched writer.
+
+    Fingerprints are loaded ``STATE_CHUNK_SIZE`` folders at a time as the
+    paths are consumed, so memory doesn't grow with the library. Folders
+    that were neither applied nor skipped (errors, or missing their mp4 or
+    json) are added to ``unseen``; the incomplete ones are also returned.
+
+    If ``progress`` is cancelled, no more folders are submitted; those
+    already in flight are still applied and committed. Fingerprint loading
+    ("enumerate"), worker ("parse") and writer ("upsert") time are added to
+    ``phase_seconds`` if given.
+    """
+    pending: deque = deque()
+    batch: list[dict] = []
+    hashed: list[dict] = []
+    incomplete: set[str] = set()
+    tag_cache = _TagCache()
+    timings = phase_seconds if phase_seconds is not None else {}
+    timings.setdefault("enumerate", 0.0)
+    timings.setdefault("parse", 0.0)
+    timings.setdefault("upsert", 0.0)
+
+    def apply(batch: list[dict]) -> None:
+        started = time.perf_counter()
+        _apply_batch(db, batch, stats, unseen, tag_cache)
+        timings["upsert"] += time.perf_counter() - started
+
+    def collect(result: dict) -> None:
+        folder_name = result["folder_name"]
+        timings["parse"] += result["seconds"]
+        if progress is not None:
+            progress.folders_done += 1
+        if result["status"] == "skipped":
+            stats["skipped"] += 1
+            if "content_hash" in result:
+                hashed.append({"folder": folder_name, "hash": result["content_hash"]})
+                if len(hashed) >= settings.scan_batch_size:
+                    _apply_hashes(db, hashed)
+                    hashed.clear()
+        elif result["status"] == "incomplete":
+            logger.debug(f"Skipping {folder_name}: {result['error']}")
+            incomplete.add(folder_name)
+            unseen.add(folder_name)
+        elif result["status"] == "error":
+            unseen.add(folder_name)
+            logger.warning(f"Error processing {folder_name}: {result['error']}")
+        else:
+            batch.append(result)
+            if len(batch) >= settings.scan_batch_size:
+                apply(batch)
+                batch.clear()
+
+    metrics.executor_queue_depth.set_function(pending.__len__, "scan")
+    try:
+        with _make_executor() as pool:
+            paths = iter(paths)
+            while chunk := list(islice(paths, STATE_CHUNK_SIZE)):
+                if progress is not None and progress.cancelled:
+                    break
+                started = time.perf_counter()
+                with ReadSessionLocal() as read_db:
+                    states = _load_states(read_db, [os.path.basename(path) for path in chunk])
+                timings["enumerate"] += time.perf_counter() - started
+                for path in chunk:
+                    if progress is not None and progress.cancelled:
+                        break
+                    if len(pending) >= settings.scan_queue_depth:
+                        collect(pending.popleft().result())
+                    pending.append(pool.submit(_scan_folder, path, states.get(os.path.basename(path)), full))
+            while pending:
+                collect(pending.popleft().result())
+    finally:
+        metrics.executor_queue_depth.set(0, "scan")
+    if batch:
+        apply(batch)
+    if hashed:
+        _apply_hashes(db, hashed)
+    return incomplete
+
+
+# Fingerprints are loaded this many folders at a time
+STATE_CHUNK_SIZE = 1000
+
+
+def _load_states(db: Session, folder_names: list[str]) -> dict:
+    q = db.query(*ScanState.__table__.columns).filter(ScanState.folder_name.in_(folder_names))
+    return {row.folder_name: row._asdict() for row in q.all()}
+
+
+def _iter_folders(video_dir: Path) -> Iterator[str]:
+    """Paths of the top-level folders, listed lazily."""
+    with os.scandir(video_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield entry.path
+
+
+def _count_folders(video_dir: Path) -> int:
+    with os.scandir(video_dir) as entries:
+        return sum(1 for entry in entries if entry.is_dir())
+
+
+def _backfill_media(db: Session) -> None:
+    """Copy media file details from scan_state onto videos scanned before
+    the media columns existed, so skipped folders get them too."""
+    db.execute(text(
+        "UPDATE videos SET "
+        "media_file = (SELECT mp4_name FROM scan_state s WHERE s.folder_name = videos.folder_name), "
+        "media_size = (SELECT mp4_size FROM scan_state s WHERE s.folder_name = videos.folder_name), "
+        "media_mtime_ns = (SELECT mp4_mtime_ns FROM scan_state s WHERE s.folder_name = videos.folder_name) "
+        "WHERE media_file IS NULL AND folder_name IN (SELECT folder_name FROM scan_state)"
+    ))
+
+
+def _forget_folders(db: Session, folder_names: list[str]) -> None:
+    """Drop fingerprints so vanished folders are re-read if they return."""
+    for i in range(0, len(folder_names), 500):
+        db.query(ScanState).filter(
+            ScanState.folder_name.in_(folder_names[i:i + 500])
+        ).delete(synchronize_session=False)
+
+
+def _reconcile_unseen(db: Session, video_dir: Path, unseen: set[str]) -> list[str]:
+    """Mark available videos whose folder is gone (or in ``unseen``) as
+    unavailable and drop their fingerprints, without loading any rows.
+
+    The folders are listed again into a temp table in batches, leaving out
+    ``unseen``, and the rest is two set-based statements. Listing again
+    instead of remembering every folder the scan saw keeps memory flat;
+    folders added since are simply not in the database yet. Returns the
+    ids of the videos marked unavailable.
+    """
+    db.execute(text("DROP TABLE IF EXISTS temp.seen_folders"))
+    db.execute(text("CREATE TEMP TABLE seen_folders (folder_name TEXT PRIMARY KEY) WITHOUT ROWID"))
+    conn = db.connection()
+    names = (name for name in map(os.path.basename, _iter_folders(video_dir)) if name not in unseen)
+    while batch := [(name,) for name in islice(names, 5000)]:
+        conn.exec_driver_sql("INSERT OR IGNORE INTO temp.seen_folders (folder_name) VALUES (?)", batch)
+
+    not_seen = "folder_name NOT IN (SELECT folder_name FROM temp.seen_folders)"
+    gone_ids = list(db.scalars(text(f"SELECT id FROM videos WHERE is_available = 1 AND {not_seen}")))
+    if gone_ids:
+        db.execute(text(f"UPDATE videos SET is_available = 0 WHERE is_available = 1 AND {not_seen}"))
+    db.execute(text(f"DELETE FROM scan_state WHERE {not_seen}"))
+    db.execute(text("DROP TABLE temp.seen_folders"))
+    return gone_ids
+
 
-        return True, False
+def _record_phases(phase_seconds: dict) -> dict:
+    for phase, seconds in phase_seconds.items():
+        metrics.scan_phase_duration.observe(seconds, phase)
+    return {phase: round(seconds, 3) for phase, seconds in phase_seconds.items()}
 
 
-def scan_videos() -> dict:
-    """Scan VIDEO_DIR and sync with the database. Returns scan stats."""
+def scan_videos(full: bool = False, progress: Optional[ScanProgress] = None) -> dict:
+    """Scan VIDEO_DIR and sync with the database. Returns scan stats.
+
+    Folders whose fingerprint matches ``scan_state`` are skipped without
+    opening any file. Pass ``full=True`` to re-read every folder.
+
+    Folder enumeration and JSON decoding run in a bounded worker pool
+    (``scan_workers`` / ``scan_queue_depth``); this thread is the only
+    writer and applies and commits results in batches of ``scan_batch_size``.
+
+    ``progress``, if given, is kept up to date and can cancel the scan.
+    Batches committed before the cancel are kept, but nothing is marked
+    unavailable since not every folder was seen.
+
+    Folders are listed lazily and fingerprints loaded in chunks as the
+    pipeline goes, so memory stays flat however big the library is.
+
+    ``phase_seconds`` in the result breaks the time down into enumerate
+    (counting folders and loading fingerprints), parse and upsert (summed
+    over workers and batches, so they can overlap each other) and reconcile.
+    """
     start = time.monotonic()
+    phase_seconds = {}
+    if progress is not None:
+        progress.phase = "listing"
     video_dir = Path(settings.video_dir)
 
     if not video_dir.exists():
         logger.warning(f"VIDEO_DIR does not exist: {video_dir}")
-        return {"added": 0, "updated": 0, "marked_unavailable": 0, "total": 0, "duration_seconds": 0.0}
+        return {"added": 0, "updated": 0, "skipped": 0, "marked_unavailable": 0, "total": 0, "duration_seconds": 0.0}
 
     db: Session = SessionLocal()
-    added = 0
-    updated = 0
-    seen_folders: set[str] = set()
+    stats = {"added": 0, "updated": 0, "skipped": 0}
+    unseen: set[str] = set()
 
     try:
-        subdirs = [p for p in video_dir.iterdir() if p.is_dir()]
-
-        for subdir in subdirs:
-            folder_name = subdir.name
-            mp4_files = list(subdir.glob("*.mp4"))
-            json_files = list(subdir.glob("*.json"))
 
-            if not mp4_files:
-                logger.debug(f"Skipping {folder_name}: no .mp4 found")
-                continue
-            if not json_files:
-                logger.debug(f"Skipping {folder_name}: no .json found")
-                continue
-
-            try:
-                meta = _parse_metadata(json_files[0])
-                is_new, was_updated = _upsert_video(db, folder_name, meta)
-                seen_folders.add(folder_name)
-                if is_new:
-                    added += 1
-                elif was_updated:
-                    updated += 1
-            except Exception as e:
-                logger.warning(f"Error processing {folder_name}: {e}")
-                continue
+        if progress is not None:
+            progress.folders_total = _count_folders(video_dir)
+            progress.scan_started = time.monotonic()
+            progress.phase = "scanning"
+        phase_seconds["enumerate"] = time.monotonic() - start
+        _run_pipeline(db, _iter_folders(video_dir), full, stats, unseen, progress, phase_seconds)
+        if progress is not None and progress.cancelled:
+            duration = time.monotonic() - start
+            logger.info(
+                f"Scan cancelled: added={stats['added']}, updated={stats['updated']}, "
+                f"skipped={stats['skipped']}, duration={duration:.2f}s"
+            )
+            return {
+                **stats,
+                "marked_unavailable": 0,
+                "total": db.query(Video).count(),
+                "duration_seconds": round(duration, 3),
+                "phase_seconds": _record_phases(phase_seconds),
+                "cancelled": True,
+            }
+        if progress is not None:
+            progress.phase = "finishing"
+        reconcile_start = time.monotonic()
+        _backfill_media(db)
 
-        # Mark videos whose folders were not seen as unavailable
-        marked_unavailable = 0
-        all_videos = db.query(Video).filter_by(is_available=True).all()
-        for video in all_videos:
-            if video.folder_name not in seen_folders:
-                video.is_available = False
-                marked_unavailable += 1
+        gone_ids = _reconcile_unseen(db, video_dir, unseen)
+        marked_unavailable = len(gone_ids)
+        if full:
+            tag_counts.recount_tags(db)
+        else:
+            tag_counts.adjust_for_videos(db, gone_ids, -1)
 
+        if marked_unavailable:
+            bump_library_version(db)
         db.commit()
+        phase_seconds["reconcile"] = time.monotonic() - reconcile_start
+        if full and tag_index.ready:
+            tag_index.load()
+        else:
+            tag_index.refresh_for_videos(gone_ids)
         total = db.query(Video).count()
 
     except Exception:
@@ -148,20 +624,77 @@ def scan_videos() -> dict:
 
     duration = time.monotonic() - start
     logger.info(
-        f"Scan complete: added={added}, updated={updated}, "
-        f"marked_unavailable={marked_unavailable}, total={total}, "
-        f"duration={duration:.2f}s"
+        f"Scan complete: added={stats['added']}, updated={stats['updated']}, "
+        f"skipped={stats['skipped']}, marked_unavailable={marked_unavailable}, "
+        f"total={total}, duration={duration:.2f}s"
     )
     return {
-        "added": added,
-        "updated": updated,
+        **stats,
         "marked_unavailable": marked_unavailable,
         "total": total,
         "duration_seconds": round(duration, 3),
+        "phase_seconds": _record_phases(phase_seconds),
     }
 
 
-async def scan_videos_async() -> dict:
+async def scan_videos_async(full: bool = False, progress: Optional[ScanProgress] = None) -> dict:
     """Async wrapper with lock to prevent concurrent scans."""
     async with _scan_lock:
-        return await asyncio.get_event_loop().run_in_executor(None, scan_videos)
+        return await asyncio.get_event_loop().run_in_executor(None, partial(scan_videos, full, progress))
+
+
+def scan_folders(folder_names: list[str]) -> dict:
+    """Sync only the given top-level folders, e.g. from the library watcher.
+
+    Complete folders are upserted. Folders that no longer exist or are
+    missing their mp4 or json are marked unavailable, like a full scan
+    would, and the incomplete ones are reported back under ``incomplete``.
+    """
+    video_dir = Path(settings.video_dir)
+    existing = [name for name in folder_names if (video_dir / name).is_dir()]
+    gone = [name for name in folder_names if name not in existing]
+
+    db: Session = SessionLocal()
+    stats = {"added": 0, "updated": 0, "skipped": 0}
+    unseen: set[str] = set()
+
+    try:
+
+        incomplete = _run_pipeline(db, [str(video_dir / name) for name in existing], False, stats, unseen)
+
+        marked_unavailable = 0
+        gone_ids = []
+        missing = gone + sorted(incomplete)
+        if missing:
+            gone_ids = list(db.scalars(
+                select(Video.id).where(Video.folder_name.in_(missing), Video.is_available == True)  # noqa: E712
+            ))
+            if gone_ids:
+                db.query(Video).filter(Video.id.in_(gone_ids)).update(
+                    {Video.is_available: False}, synchronize_session=False
+                )
+                tag_counts.adjust_for_videos(db, gone_ids, -1)
+            marked_unavailable = len(gone_ids)
+            _forget_folders(db, missing)
+        if marked_unavailable:
+            bump_library_version(db)
+        db.commit()
+        tag_index.refresh_for_videos(gone_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if stats["added"] or stats["updated"] or marked_unavailable:
+        logger.info(
+            f"Folder sync: added={stats['added']}, updated={stats['updated']}, "
+            f"marked_unavailable={marked_unavailable}"
+        )
+    return {**stats, "marked_unavailable": marked_unavailable, "incomplete": sorted(incomplete)}
+
+
+async def scan_folders_async(folder_names: list[str]) -> dict:
+    """Run ``scan_folders`` off the event loop, serialised with full scans."""
+    async with _scan_lock:
+        return await asyncio.get_event_loop().run_in_executor(None, partial(scan_folders, folder_names))
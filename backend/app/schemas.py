@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 
@@ -31,6 +32,7 @@ class VideoSummary(BaseModel):
     epoch: Optional[int] = None
     is_available: bool
     tags: list[str] = []
+    snippet: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -40,8 +42,33 @@ class VideoDetail(VideoSummary):
     description: Optional[str] = None
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
 class VideoListResponse(BaseModel):
     items: list[VideoSummary]
+    total: Optional[int] = None
+    page: int
+    page_size: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+    # Only when requested with ``facets``: name -> top values for the filter
+    facets: Optional[dict[str, list[FacetCount]]] = None
+
+
+class DuplicateGroup(BaseModel):
+    content_hash: str
+    copies: int
+    media_size: Optional[int] = None
+    # Disk used by all copies but one
+    wasted_bytes: Optional[int] = None
+    videos: list[VideoSummary]
+
+
+class DuplicateGroupsResponse(BaseModel):
+    groups: list[DuplicateGroup]
     total: int
     page: int
     page_size: int
@@ -55,9 +82,53 @@ class TagAddRequest(BaseModel):
 class ScanResult(BaseModel):
     added: int
     updated: int
+    skipped: int = 0
     marked_unavailable: int
     total: int
     duration_seconds: float
+    # enumerate / parse / upsert / reconcile
+    phase_seconds: dict[str, float] = {}
+    cancelled: bool = False
+
+
+class ScanJobStatus(BaseModel):
+    id: str
+    full: bool
+    status: Literal["running", "completed", "cancelled", "failed"]
+    phase: Literal["waiting", "listing", "scanning", "finishing", "done"]
+    folders_total: Optional[int] = None
+    folders_done: int
+    rate_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    elapsed_seconds: float
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[ScanResult] = None
+    error: Optional[str] = None
+
+
+class WatcherStatus(BaseModel):
+    backend: Optional[str] = None
+    pending_folders: int
+    waiting_folders: int
+    lag_seconds: float
+    last_sync_lag_seconds: Optional[float] = None
+    events: int
+    syncs: int
+
+
+class TagIndexStatus(BaseModel):
+    tags: int
+    memory_bytes: int
+
+
+class ResponseCacheStatus(BaseModel):
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
 
 
 class AdminStatus(BaseModel):
@@ -66,3 +137,8 @@ class AdminStatus(BaseModel):
     total_tags: int
     video_dir: str
     database_url: str
+    watcher: Optional[WatcherStatus] = None
+    tag_index: Optional[TagIndexStatus] = None
+    response_cache: Optional[ResponseCacheStatus] = None
+    facet_cache: Optional[ResponseCacheStatus] = None
+    scan: Optional[ScanJobStatus] = None
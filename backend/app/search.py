@@ -0,0 +1,97 @@
+"""SQLite FTS5 index over video titles, descriptions, uploaders and tags.
+
+``videos_fts`` is a standalone FTS5 table whose rowid mirrors
+``videos.rowid`` so rows can be replaced by id cheaply; ``video_id`` is
+stored alongside it and used for joins, so results never depend on rowids
+staying in step. The scanner and the tag add/remove paths in ``crud`` call
+``reindex_videos`` for every video they touch.
+"""
+import html
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import bindparam, column, func, literal_column, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Set by init_search_index(); False if this SQLite build lacks FTS5
+SEARCH_ENABLED = False
+
+videos_fts = table("videos_fts", column("video_id"))
+MATCH_TARGET = literal_column("videos_fts")
+RANK = literal_column("videos_fts.rank")
+# Highlights are marked with private-use characters so the text can be
+# escaped before they become <mark> tags (render_snippet)
+_MARK_START, _MARK_END = "\ue000", "\ue001"
+SNIPPET = func.snippet(MATCH_TARGET, -1, _MARK_START, _MARK_END, "…", 16)
+
+_CREATE = text(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5("
+    "video_id UNINDEXED, title, description, uploader, tags, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+_SOURCE = (
+    "SELECT v.rowid, v.id, v.title, v.description, v.uploader, "
+    "(SELECT group_concat(t.name, ' ') FROM video_tags vt "
+    "JOIN tags t ON t.id = vt.tag_id WHERE vt.video_id = v.id) "
+    "FROM videos v"
+)
+_INSERT = "INSERT INTO videos_fts (rowid, video_id, title, description, uploader, tags) "
+
+_DELETE_IDS = text(
+    "DELETE FROM videos_fts WHERE rowid IN (SELECT rowid FROM videos WHERE id IN :ids)"
+).bindparams(bindparam("ids", expanding=True))
+_INSERT_IDS = text(_INSERT + _SOURCE + " WHERE v.id IN :ids").bindparams(bindparam("ids", expanding=True))
+
+# Rows whose rowid no longer points at the same video (e.g. after VACUUM)
+_CONSISTENT = text(
+    "SELECT (SELECT count(*) FROM videos), "
+    "(SELECT count(*) FROM videos_fts f JOIN videos v ON v.rowid = f.rowid AND v.id = f.video_id)"
+)
+
+
+def render_snippet(raw: Optional[str]) -> Optional[str]:
+    """HTML for a ``SNIPPET``: the text escaped, highlights in ``<mark>``."""
+    if raw is None:
+        return None
+    return html.escape(raw).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def init_search_index(conn: Connection) -> None:
+    """Create ``videos_fts`` and rebuild it if it is out of step."""
+    global SEARCH_ENABLED
+    try:
+        conn.execute(_CREATE)
+    except OperationalError as e:
+        logger.warning(f"Full-text search disabled: {e}")
+        SEARCH_ENABLED = False
+        return
+    SEARCH_ENABLED = True
+    videos, indexed = conn.execute(_CONSISTENT).one()
+    if videos != indexed:
+        logger.info(f"Rebuilding search index ({indexed}/{videos} rows current)")
+        conn.execute(text("DELETE FROM videos_fts"))
+        conn.execute(text(_INSERT + _SOURCE))
+
+
+def reindex_videos(db: Session, video_ids: list[str]) -> None:
+    """Refresh the search rows of ``video_ids`` from videos and tags."""
+    if not SEARCH_ENABLED or not video_ids:
+        return
+    for i in range(0, len(video_ids), 500):
+        ids = video_ids[i:i + 500]
+        db.execute(_DELETE_IDS, {"ids": ids})
+        db.execute(_INSERT_IDS, {"ids": ids})
+
+
+def match_expression(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
@@ -0,0 +1,45 @@
+"""JSON bodies for the video endpoints, written without pydantic.
+
+Rows from ``crud`` already carry the schema's types (SQLAlchemy converts
+``Boolean`` and ``Float`` columns), so validating them into models and
+serializing those again only costs time. These functions add whatever
+optional fields the rows lack (e.g. ``snippet`` outside search) and hand
+the dicts to orjson; the routes keep their ``response_model`` so the
+OpenAPI schema is unchanged.
+"""
+from typing import Optional
+
+from .metadata import json_dumps
+from .schemas import VideoDetail, VideoSummary
+
+SUMMARY_FIELDS = tuple(VideoSummary.model_fields)
+DETAIL_FIELDS = tuple(VideoDetail.model_fields)
+
+
+def _missing(item: dict, fields: tuple[str, ...]) -> dict:
+    """Defaults for the ``fields`` that ``item`` has no key for."""
+    return {name: VideoDetail.model_fields[name].default for name in fields if name not in item}
+
+
+def video_list_json(
+    items: list[dict], total: Optional[int], page: int, page_size: int, next_cursor: Optional[str],
+    facets: Optional[dict] = None,
+) -> bytes:
+    """A ``VideoListResponse`` body."""
+    # Every item of a page comes from the same query and has the same keys
+    missing = _missing(items[0], SUMMARY_FIELDS) if items else {}
+    if missing:
+        items = [{**item, **missing} for item in items]
+    return json_dumps({
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "has_next": next_cursor is not None,
+        "next_cursor": next_cursor,
+        "facets": facets,
+    })
+
+
+def video_detail_json(detail: dict) -> bytes:
+    return json_dumps({**detail, **_missing(detail, DETAIL_FIELDS)})
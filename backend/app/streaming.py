@@ -0,0 +1,185 @@
+"""Range-aware media file responses.
+
+Whole-file responses are handed to the server with the ASGI
+``http.response.pathsend`` extension when it is offered, so the server can
+use ``sendfile`` and no bytes pass through Python. Otherwise the file is read
+with ``os.pread`` on a dedicated thread pool in chunks that start small (a
+seek gets its first bytes quickly) and double up to ``MAX_CHUNK_SIZE``.
+"""
+import asyncio
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from . import metrics
+from .config import settings
+
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=settings.stream_io_threads, thread_name_prefix="stream")
+metrics.executor_queue_depth.set_function(_executor._work_queue.qsize, "stream")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_ranges(range_header: str, file_size: int) -> Optional[list[tuple[int, int]]]:
+    """Parse a ``Range`` header into sorted, merged inclusive byte ranges.
+
+    Returns None if the header is malformed or not in bytes, in which case
+    it must be ignored (RFC 9110 §14.2). Raises ``RangeNotSatisfiable`` if
+    no range overlaps the file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_str, sep, end_str = part.strip().partition("-")
+        start_str, end_str = start_str.strip(), end_str.strip()
+        if not sep or not (start_str.isdigit() or start_str == "") or not (end_str.isdigit() or end_str == ""):
+            return None
+        if start_str == "":
+            if end_str == "":
+                return None
+            # Suffix range: the last N bytes
+            suffix = int(end_str)
+            if suffix == 0:
+                continue
+            start, end = max(file_size - suffix, 0), file_size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+            if end_str and end < start:
+                return None
+            if start >= file_size:
+                continue
+            end = min(end, file_size - 1)
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+async def _read_range(fd: int, start: int, end: int) -> AsyncGenerator[bytes, None]:
+    loop = asyncio.get_running_loop()
+    chunk_size = MIN_CHUNK_SIZE
+    pos = start
+    while pos <= end:
+        chunk = await loop.run_in_executor(_executor, os.pread, fd, min(chunk_size, end - pos + 1), pos)
+        if not chunk:
+            break
+        pos += len(chunk)
+        metrics.stream_bytes.inc(len(chunk))
+        yield chunk
+        chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+
+
+class MediaFileResponse(StreamingResponse):
+    """Serve ``path`` honouring ``Range``: 200, 206 (single or multipart
+    ``byteranges``) or 416."""
+
+    def __init__(
+        self,
+        path: Path,
+        file_size: int,
+        range_header: Optional[str] = None,
+        media_type: str = "video/mp4",
+        headers: Optional[dict] = None,
+    ) -> None:
+        self.path = path
+        headers = {"Accept-Ranges": "bytes", **(headers or {})}
+
+        try:
+            ranges = parse_ranges(range_header, file_size) if range_header else None
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{file_size}"
+            headers["Content-Length"] = "0"
+            super().__init__(_empty(), status_code=416, headers=headers)
+            return
+
+        if ranges is None:
+            headers["Content-Length"] = str(file_size)
+            super().__init__(self._body([(0, file_size - 1)]), status_code=200, headers=headers, media_type=media_type)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            super().__init__(self._body(ranges), status_code=206, headers=headers, media_type=media_type)
+        else:
+            boundary = secrets.token_hex(16)
+            parts = [
+                (
+                    (
+                        f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                        f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                    ).encode("latin-1"),
+                    start,
+                    end,
+                )
+                for start, end in ranges
+            ]
+            closing = f"--{boundary}--\r\n".encode("latin-1")
+            # Each part is: header, body, CRLF
+            length = sum(len(head) + (end - start + 1) + 2 for head, start, end in parts) + len(closing)
+            headers["Content-Length"] = str(length)
+            super().__init__(
+                self._multipart_body(parts, closing),
+                status_code=206,
+                headers=headers,
+                media_type=f"multipart/byteranges; boundary={boundary}",
+            )
+
+    async def _body(self, ranges: list[tuple[int, int]]) -> AsyncGenerator[bytes, None]:
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            for start, end in ranges:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, start, end - start + 1, os.POSIX_FADV_SEQUENTIAL)
+                async for chunk in _read_range(fd, start, end):
+                    yield chunk
+        finally:
+            os.close(fd)
+
+    async def _multipart_body(self, parts: list[tuple[bytes, int, int]], closing: bytes) -> AsyncGenerator[bytes, None]:
+        for head, start, end in parts:
+            yield head
+            async for chunk in self._body([(start, end)]):
+                yield chunk
+            yield b"\r\n"
+        yield closing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        metrics.active_streams.inc()
+        try:
+            if self.status_code == 200 and "http.response.pathsend" in scope.get("extensions", {}):
+                await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+                await send({"type": "http.response.pathsend", "path": str(self.path)})
+                metrics.stream_bytes.inc(int(self.headers["content-length"]))
+                return
+            await super().__call__(scope, receive, send)
+        finally:
+            metrics.active_streams.dec()
+
+
+async def _empty() -> AsyncGenerator[bytes, None]:
+    return
+    yield
@@ -0,0 +1,68 @@
+"""Maintained ``tags.video_count``: how many *available* videos carry a tag.
+
+Counts are kept by deltas: the scanner adds one per tag of each video that
+is inserted or becomes available again and subtracts one per tag of each
+video it marks unavailable; tag edits in ``crud`` adjust a single tag. A
+full scan recounts everything, and ``init_tag_counts`` backfills databases
+created before the column existed.
+"""
+import logging
+
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import Tag
+
+logger = logging.getLogger(__name__)
+
+# Aggregate once and join (UPDATE ... FROM, SQLite 3.33+); a correlated
+# count per tag makes the planner walk every available video for each tag.
+_RECOUNT_ALL = [
+    text("UPDATE tags SET video_count = 0"),
+    text(
+        "UPDATE tags SET video_count = c.n FROM ("
+        "SELECT vt.tag_id, count(*) AS n FROM video_tags vt "
+        "JOIN videos v ON v.id = vt.video_id WHERE v.is_available = 1 GROUP BY vt.tag_id"
+        ") AS c WHERE c.tag_id = tags.id"
+    ),
+]
+_ADJUST_FOR_VIDEOS = text(
+    "UPDATE tags SET video_count = coalesce(video_count, 0) + :delta * c.n FROM ("
+    "SELECT tag_id, count(*) AS n FROM video_tags WHERE video_id IN :ids GROUP BY tag_id"
+    ") AS c WHERE c.tag_id = tags.id"
+).bindparams(bindparam("ids", expanding=True))
+
+
+def init_tag_counts(conn: Connection) -> None:
+    """Fill ``name_folded`` and ``video_count`` where they are missing."""
+    unfolded = conn.execute(select(Tag.id, Tag.name).where(Tag.name_folded.is_(None))).all()
+    if unfolded:
+        conn.execute(
+            update(Tag.__table__).where(Tag.__table__.c.id == bindparam("tag_id")),
+            [{"tag_id": tag_id, "name_folded": name.casefold()} for tag_id, name in unfolded],
+        )
+    if conn.execute(select(Tag.id).where(Tag.video_count.is_(None)).limit(1)).first():
+        logger.info("Counting videos per tag")
+        for stmt in _RECOUNT_ALL:
+            conn.execute(stmt)
+
+
+def recount_tags(db: Session) -> None:
+    for stmt in _RECOUNT_ALL:
+        db.execute(stmt)
+
+
+def adjust_for_videos(db: Session, video_ids: list[str], delta: int) -> None:
+    """Add ``delta`` to each tag once per video in ``video_ids`` carrying it."""
+    for i in range(0, len(video_ids), 500):
+        db.execute(_ADJUST_FOR_VIDEOS, {"ids": video_ids[i:i + 500], "delta": delta})
+
+
+def adjust_tag_count(db: Session, tag_id: int, delta: int) -> None:
+    db.execute(
+        update(Tag)
+        .where(Tag.id == tag_id)
+        .values(video_count=func.coalesce(Tag.video_count, 0) + delta)
+        .execution_options(synchronize_session=False)
+    )
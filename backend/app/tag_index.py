@@ -0,0 +1,282 @@
+"""In-process tag index for autocomplete (``TAG_INDEX_ENABLED``).
+
+Case-folded tag names are kept in a sorted array next to their ids; usage
+counts live in a dict by id. A prefix is a ``bisect`` range, substrings
+are found with ``str.find`` over one newline-joined copy of the names, and
+typos are matched by walking the sorted array as an implicit trie with a
+bounded edit-distance row. The scanner and tag edits refresh the affected
+entries from the database after they commit, so the index only ever holds
+committed state.
+"""
+import heapq
+import logging
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, select, text
+
+from .database import ReadSessionLocal
+from .models import Tag
+
+logger = logging.getLogger(__name__)
+
+_MAX_CHAR = "\U0010ffff"
+# Above this many candidates, walk tags in usage order instead of sorting
+_RANK_BY_SORT_MAX = 1000
+_LINKED_TAGS = text(
+    "SELECT id, name, video_count FROM tags WHERE id IN "
+    "(SELECT tag_id FROM video_tags WHERE video_id IN :ids)"
+).bindparams(bindparam("ids", expanding=True))
+
+
+def _max_typos(query: str) -> int:
+    if len(query) < 4:
+        return 0
+    return 1 if len(query) < 9 else 2
+
+
+class TagIndex:
+    def __init__(self) -> None:
+        # Taken by searches, and by updates only to swap in their results
+        self._lock = threading.Lock()
+        # Serializes updates, which build their new state outside _lock
+        self._update_lock = threading.Lock()
+        self._keys: list[str] = []  # sorted case-folded names
+        self._ids: list[int] = []  # tag id for each key
+        # Per tag id; the folded names are the same objects as in _keys
+        self._names: dict[int, str] = {}
+        self._folded: dict[int, str] = {}
+        self._counts: dict[int, int] = {}
+        self._blob: Optional[str] = None  # "\n".join(self._keys), built lazily
+        self._starts: list[int] = []
+        self._by_usage: Optional[list[int]] = None  # all ids, most used first
+        self.ready = False
+
+    # -- maintenance ---------------------------------------------------------
+
+    def _set(self, rows: Iterable) -> None:
+        """Apply re-read tag rows. Call with ``_update_lock`` held.
+
+        New tags are merged into the sorted arrays in one O(n) pass of slice
+        copies into new lists, so ``_lock`` is only held to swap them in.
+        """
+        counts: dict[int, int] = {}
+        new: dict[int, str] = {}
+        for tag_id, name, count in rows:
+            counts[tag_id] = count or 0
+            if tag_id not in self._names:
+                new[tag_id] = name
+        if new:
+            folded = {tag_id: name.casefold() for tag_id, name in new.items()}
+            keys: list[str] = []
+            ids: list[int] = []
+            start = 0
+            for key, tag_id in sorted((key, tag_id) for tag_id, key in folded.items()):
+                pos = bisect_right(self._keys, key, start)
+                keys += self._keys[start:pos]
+                ids += self._ids[start:pos]
+                keys.append(key)
+                ids.append(tag_id)
+                start = pos
+            keys += self._keys[start:]
+            ids += self._ids[start:]
+        with self._lock:
+            self._counts.update(counts)
+            self._by_usage = None
+            if new:
+                self._names.update(new)
+                self._folded.update(folded)
+                self._keys, self._ids = keys, ids
+                self._blob = None
+
+    def load(self) -> None:
+        with self._update_lock:
+            with ReadSessionLocal() as db:
+                rows = db.execute(select(Tag.id, Tag.name, Tag.video_count)).all()
+            names = {tag_id: name for tag_id, name, _ in rows}
+            folded = {tag_id: name.casefold() for tag_id, name in names.items()}
+            counts = {tag_id: count or 0 for tag_id, _, count in rows}
+            order = sorted(folded, key=folded.__getitem__)
+            with self._lock:
+                self._names, self._folded, self._counts = names, folded, counts
+                self._ids = order
+                self._keys = [folded[tag_id] for tag_id in order]
+                self._blob = None
+                self._by_usage = None
+                # Build the lazy structures now rather than on the first keystroke
+                self._ensure_blob()
+                self._usage_order()
+                self.ready = True
+        logger.info(f"Tag index loaded: {len(names)} tags, {self.memory_bytes() // 1024} KiB")
+
+    def refresh_tags(self, tag_ids: list[int]) -> None:
+        """Re-read ``tag_ids`` after a commit that changed them."""
+        if not self.ready or not tag_ids:
+            return
+        with self._update_lock:
+            with ReadSessionLocal() as db:
+                rows = db.execute(select(Tag.id, Tag.name, Tag.video_count).where(Tag.id.in_(tag_ids))).all()
+            self._set(rows)
+
+    def refresh_for_videos(self, video_ids: list[str]) -> None:
+        """Re-read every tag linked to ``video_ids``."""
+        if not self.ready or not video_ids:
+            return
+        with self._update_lock:
+            # Read under the lock too, so updates apply in commit order
+            with ReadSessionLocal() as db:
+                rows = [
+                    row
+                    for i in range(0, len(video_ids), 500)
+                    for row in db.execute(_LINKED_TAGS, {"ids": video_ids[i:i + 500]}).all()
+                ]
+            self._set(rows)
+
+    # -- queries ---------------------------------------------------------------
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        return bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + _MAX_CHAR)
+
+    def _ensure_blob(self) -> str:
+        if self._blob is None:
+            self._blob = "\n".join(self._keys)
+            starts, pos = [], 0
+            for key in self._keys:
+                starts.append(pos)
+                pos += len(key) + 1
+            self._starts = starts
+        return self._blob
+
+    def _infix(self, query: str, limit: int) -> list[int]:
+        """Ids of tags containing ``query`` anywhere but at the start; only
+        the ``limit`` most used if there are many."""
+        blob, starts, keys = self._ensure_blob(), self._starts, self._keys
+        if blob.count(query) > _RANK_BY_SORT_MAX:
+            # Common substring: cheaper to test the most used tags in order
+            folded = self._folded
+            matches = (
+                tag_id for tag_id in self._usage_order()
+                if query in folded[tag_id] and not folded[tag_id].startswith(query)
+            )
+            return list(islice(matches, limit))
+        found = []
+        at = blob.find(query)
+        while at != -1:
+            pos = bisect_right(starts, at) - 1
+            if at > starts[pos]:
+                found.append(self._ids[pos])
+            # Resume at the next key; one match per key is enough
+            at = blob.find(query, starts[pos] + len(keys[pos]) + 1)
+        return found
+
+    def _fuzzy(self, query: str, max_typos: int) -> dict[int, int]:
+        """Positions of keys whose prefix is within ``max_typos`` edits of
+        ``query``, with the distance. Edits are insertions, deletions,
+        substitutions and adjacent transpositions; the sorted keys are
+        walked as a trie, pruning branches that can no longer match."""
+        keys = self._keys
+        found: dict[int, int] = {}
+        n = len(query)
+
+        def walk(prefix: str, lo: int, hi: int, row: list[int], prev_row: Optional[list[int]]) -> None:
+            if row[n] <= max_typos:
+                for pos in range(lo, hi):
+                    found[pos] = row[n]
+                return
+            if min(row) > max_typos:
+                return
+            depth = len(prefix)
+            # Keys equal to the prefix itself sort first and have no child
+            while lo < hi and len(keys[lo]) == depth:
+                lo += 1
+            while lo < hi:
+                char = keys[lo][depth]
+                child = prefix + char
+                child_hi = bisect_left(keys, child + _MAX_CHAR, lo, hi)
+                next_row = [row[0] + 1]
+                for i in range(1, n + 1):
+                    cost = min(next_row[i - 1] + 1, row[i] + 1, row[i - 1] + (query[i - 1] != char))
+                    if (
+                        prev_row is not None and i > 1
+                        and query[i - 1] == prefix[-1] and query[i - 2] == char
+                    ):
+                        cost = min(cost, prev_row[i - 2] + 1)
+                    next_row.append(cost)
+                walk(child, lo, child_hi, next_row, row)
+                lo = child_hi
+
+        walk("", 0, len(keys), list(range(n + 1)), None)
+        return found
+
+    def _usage_order(self) -> list[int]:
+        """All tag ids, most used first, then by name."""
+        if self._by_usage is None:
+            # _ids is in name order and the sort is stable
+            self._by_usage = sorted(self._ids, key=self._counts.__getitem__, reverse=True)
+        return self._by_usage
+
+    def _top(self, tag_ids: list[int], limit: int) -> list[int]:
+        """The ``limit`` most used of ``tag_ids``."""
+        if len(tag_ids) <= _RANK_BY_SORT_MAX:
+            counts, folded = self._counts, self._folded
+            return heapq.nsmallest(limit, tag_ids, key=lambda tag_id: (-counts[tag_id], folded[tag_id]))
+        wanted = set(tag_ids)
+        return list(islice((tag_id for tag_id in self._usage_order() if tag_id in wanted), limit))
+
+    def search(self, q: Optional[str], limit: int = 50) -> list[dict]:
+        """Tags matching ``q`` as a prefix, then as a substring, then with
+        typos; each group ranked by usage (typos by distance first)."""
+        query = (q or "").casefold()
+        with self._lock:
+            if not query:
+                ranked = self._usage_order()[:limit]
+            elif "\n" in query:
+                ranked = []
+            else:
+                lo, hi = self._prefix_range(query)
+                ranked = self._top(self._ids[lo:hi], limit)
+                if len(ranked) < limit:
+                    ranked += self._top(self._infix(query, limit - len(ranked)), limit - len(ranked))
+                max_typos = _max_typos(query)
+                if len(ranked) < limit and max_typos:
+                    seen = set(ranked)
+                    by_distance: dict[int, list[int]] = {}
+                    for pos, distance in self._fuzzy(query, max_typos).items():
+                        if self._ids[pos] not in seen:
+                            by_distance.setdefault(distance, []).append(self._ids[pos])
+                    for distance in sorted(by_distance):
+                        if len(ranked) >= limit:
+                            break
+                        ranked += self._top(by_distance[distance], limit - len(ranked))
+            return [{"id": tag_id, "name": self._names[tag_id], "video_count": self._counts[tag_id]} for tag_id in ranked]
+
+    # -- status ----------------------------------------------------------------
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the index: containers, names and ints.
+
+        Folded names that are also the original name, and small ints that
+        Python caches, are counted anyway, so this errs on the high side.
+        """
+        containers = (self._keys, self._ids, self._names, self._folded, self._counts, self._starts)
+        size = sum(sys.getsizeof(c) for c in containers)
+        size += sum(sys.getsizeof(k) for k in self._keys)
+        size += sum(sys.getsizeof(name) for name in self._names.values())
+        size += sum(sys.getsizeof(i) for i in self._ids)
+        size += sum(sys.getsizeof(n) for n in self._counts.values())
+        size += sum(sys.getsizeof(s) for s in self._starts)
+        if self._by_usage is not None:
+            size += sys.getsizeof(self._by_usage)
+        if self._blob is not None:
+            size += sys.getsizeof(self._blob)
+        return size
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"tags": len(self._names), "memory_bytes": self.memory_bytes()}
+
+
+tag_index = TagIndex()
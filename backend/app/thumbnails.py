@@ -0,0 +1,204 @@
+"""Locally generated thumbnails.
+
+A thumbnail is made from an image sitting next to the mp4 (yt-dlp's
+``--write-thumbnail`` output) or, failing that, a frame of the mp4 itself,
+scaled with ``ffmpeg`` to one of ``WIDTHS``. Results are stored in a cache
+directory under a key derived from the source file's path, size, mtime and
+the width, so a replaced source gets a new entry and an unchanged one is
+never regenerated. The key is deliberately not a content hash: it is
+recomputed on every request, cache hits included, and a ``stat`` is much
+cheaper than reading the source. Generation runs on a small dedicated
+pool; concurrent requests for the same thumbnail share one job.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from . import metrics
+from .config import settings
+from .database import SQLITE_PATH
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 640)
+DEFAULT_WIDTH = 320
+IMAGE_SUFFIXES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp", ".png": "image/png"}
+# Bump to invalidate every cached thumbnail after changing the encoding
+_FORMAT_VERSION = 1
+
+_executor = ThreadPoolExecutor(max_workers=settings.thumbnail_workers, thread_name_prefix="thumb")
+metrics.executor_queue_depth.set_function(_executor._work_queue.qsize, "thumbnail")
+_lock = threading.Lock()
+_inflight: dict[str, Future] = {}
+# Keys whose source could not be converted; a changed source gets a new key
+_failed: set[str] = set()
+_FAILED_MAX = 10_000
+
+
+class Thumbnail(NamedTuple):
+    path: Path
+    media_type: str
+    etag: str
+
+
+class _Job(NamedTuple):
+    key: str
+    # Tried in order: the folder's image, then the mp4
+    sources: tuple[Path, ...]
+    dest: Path
+    width: int
+
+
+def snap_width(width: int) -> int:
+    """The smallest supported width that is at least ``width``."""
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def _cache_dir() -> Optional[Path]:
+    if settings.thumbnail_cache_dir:
+        return Path(settings.thumbnail_cache_dir)
+    if SQLITE_PATH is not None:
+        return SQLITE_PATH.parent / "thumbnail-cache"
+    return None
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg() -> Optional[str]:
+    """Looked up once per process; installing ffmpeg needs a restart."""
+    return shutil.which(settings.ffmpeg_path)
+
+
+def _find_image(mp4_path: Path) -> Optional[Path]:
+    """An image in the video's folder, preferring one named like the mp4."""
+    candidates = []
+    try:
+        with os.scandir(mp4_path.parent) as entries:
+            for entry in entries:
+                suffix = os.path.splitext(entry.name)[1].lower()
+                if suffix in IMAGE_SUFFIXES and entry.is_file():
+                    candidates.append(Path(entry.path))
+    except OSError:
+        return None
+    if not candidates:
+        return None
+    candidates.sort(key=lambda p: (p.stem != mp4_path.stem, p.name))
+    return candidates[0]
+
+
+def _source_key(source: Path, width: int) -> str:
+    st = source.stat()
+    ident = f"{_FORMAT_VERSION}:{source.parent.name}/{source.name}:{st.st_size}:{st.st_mtime_ns}:{width}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+
+def _ffmpeg_command(ffmpeg: str, source: Path, out: Path, width: int, seek: float) -> list[str]:
+    cmd = [ffmpeg, "-nostdin", "-v", "error", "-y"]
+    if seek:
+        cmd += ["-ss", str(seek)]
+    return cmd + [
+        "-i", str(source),
+        "-frames:v", "1",
+        "-vf", f"scale='min(iw,{width})':-2",
+        "-q:v", "4",
+        "-f", "image2", "-c:v", "mjpeg",
+        str(out),
+    ]
+
+
+def _generate(ffmpeg: str, source: Path, dest: Path, width: int) -> bool:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    # Skip the first seconds of a video (often black); short videos retry at 0
+    seeks = [0.0] if source.suffix.lower() in IMAGE_SUFFIXES else [settings.thumbnail_seek_seconds, 0.0]
+    try:
+        for seek in seeks:
+            try:
+                subprocess.run(
+                    _ffmpeg_command(ffmpeg, source, tmp, width, seek),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    timeout=settings.thumbnail_timeout_seconds,
+                    check=True,
+                )
+            except subprocess.CalledProcessError as e:
+                logger.debug(f"ffmpeg failed for {source}: {e.stderr.decode(errors='replace').strip()}")
+                continue
+            except subprocess.TimeoutExpired:
+                logger.warning(f"ffmpeg timed out generating a thumbnail for {source}")
+                return False
+            if tmp.exists() and tmp.stat().st_size > 0:
+                os.replace(tmp, dest)
+                return True
+        return False
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _job(ffmpeg: str, job: _Job) -> bool:
+    ok = False
+    for source in job.sources:
+        try:
+            ok = _generate(ffmpeg, source, job.dest, job.width)
+        except Exception:
+            logger.exception(f"Thumbnail generation failed for {source}")
+        if ok:
+            break
+    with _lock:
+        _inflight.pop(job.key, None)
+        if not ok:
+            if len(_failed) >= _FAILED_MAX:
+                _failed.clear()
+            _failed.add(job.key)
+    return ok
+
+
+def _lookup(mp4_path: Path, width: int, ffmpeg: Optional[str]) -> Union[Thumbnail, _Job, None]:
+    """The filesystem part of ``get_thumbnail``, run off the event loop: a
+    thumbnail ready to serve, the job that would make it, or None."""
+    image = _find_image(mp4_path)
+    cache_dir = _cache_dir()
+    try:
+        if ffmpeg is None or cache_dir is None:
+            # Can't resize; the folder's own image is still better than nothing
+            if image is None:
+                return None
+            return Thumbnail(image, IMAGE_SUFFIXES[image.suffix.lower()], _source_key(image, 0))
+
+        key = _source_key(image or mp4_path, width)
+    except OSError:
+        # Removed since it was found
+        return None
+    dest = cache_dir / key[:2] / f"{key}.jpg"
+    if dest.exists():
+        return Thumbnail(dest, "image/jpeg", key)
+    # If the image can't be converted, fall back to a frame of the video
+    return _Job(key, (image, mp4_path) if image else (mp4_path,), dest, width)
+
+
+async def get_thumbnail(mp4_path: Path, width: int) -> Optional[Thumbnail]:
+    """Return a cached thumbnail for the video at ``mp4_path``, generating it
+    on the worker pool if needed. None if there is nothing to show."""
+    ffmpeg = _ffmpeg()
+    found = await asyncio.to_thread(_lookup, mp4_path, snap_width(width), ffmpeg)
+    if not isinstance(found, _Job):
+        return found
+
+    job = found
+    with _lock:
+        if job.key in _failed:
+            return None
+        future = _inflight.get(job.key)
+        if future is None:
+            future = _executor.submit(_job, ffmpeg, job)
+            _inflight[job.key] = future
+    if not await asyncio.wrap_future(future):
+        return None
+    return Thumbnail(job.dest, "image/jpeg", job.key)
@@ -0,0 +1,163 @@
+"""Live library updates: turn filesystem events into targeted folder syncs."""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import settings
+from .scanner import scan_folders_async
+
+try:
+    from watchfiles import awatch
+except ImportError:  # fall back to polling folder mtimes
+    awatch = None
+
+logger = logging.getLogger(__name__)
+logging.getLogger("watchfiles").setLevel(logging.WARNING)
+
+# How often (ms) the watchfiles thread checks the stop event, and how long
+# stop() waits for the tasks to wind down before cancelling them. Cancelling
+# while the Rust thread is still running aborts the process at loop close.
+RUST_TIMEOUT_MS = 500
+STOP_TIMEOUT_SECONDS = 5.0
+
+
+class LibraryWatcher:
+    """Watches VIDEO_DIR and syncs only the folders that changed.
+
+    Events are collected per top-level folder and debounced: a folder is
+    synced once it has been quiet for ``watch_debounce_seconds``. Folders
+    that still lack their mp4 or json (e.g. a download in progress) are
+    left waiting until the next event for them.
+    """
+
+    def __init__(self) -> None:
+        # folder -> (first event, last event), monotonic seconds
+        self._pending: dict[str, tuple[float, float]] = {}
+        self._waiting: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._stop: Optional[asyncio.Event] = None
+        self.backend: Optional[str] = None
+        self.events = 0
+        self.syncs = 0
+        self.last_sync_lag: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        video_dir = Path(settings.video_dir)
+        if not video_dir.is_dir():
+            logger.warning(f"Not watching: VIDEO_DIR does not exist: {video_dir}")
+            return
+        self._stop = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._watch(video_dir)),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        if self._tasks:
+            done = asyncio.gather(*self._tasks, return_exceptions=True)
+            try:
+                await asyncio.wait_for(asyncio.shield(done), timeout=STOP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("Watcher did not stop in time; cancelling it")
+                for task in self._tasks:
+                    task.cancel()
+                await done
+        self._tasks = []
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        oldest = min((first for first, _ in self._pending.values()), default=None)
+        return {
+            "backend": self.backend,
+            "pending_folders": len(self._pending),
+            "waiting_folders": len(self._waiting),
+            "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "last_sync_lag_seconds": self.last_sync_lag,
+            "events": self.events,
+            "syncs": self.syncs,
+        }
+
+    def _note(self, folder_name: str) -> None:
+        now = time.monotonic()
+        first, _ = self._pending.get(folder_name, (now, now))
+        self._pending[folder_name] = (first, now)
+        self.events += 1
+
+    async def _watch(self, video_dir: Path) -> None:
+        if awatch is not None and not settings.watch_force_polling:
+            self.backend = "inotify"
+            try:
+                await self._watch_events(video_dir)
+                return
+            except Exception as e:
+                logger.warning(f"Filesystem events unavailable ({e}); falling back to polling")
+        self.backend = "polling"
+        await self._poll(video_dir)
+
+    async def _watch_events(self, video_dir: Path) -> None:
+        root = str(video_dir)
+        async for changes in awatch(
+            root, stop_event=self._stop, debounce=200, rust_timeout=RUST_TIMEOUT_MS, recursive=True,
+        ):
+            for _, path in changes:
+                rel = os.path.relpath(path, root)
+                if rel == "." or rel.startswith(".."):
+                    continue
+                self._note(rel.split(os.sep, 1)[0])
+
+    @staticmethod
+    def _snapshot(video_dir: Path) -> dict[str, int]:
+        with os.scandir(video_dir) as entries:
+            return {e.name: e.stat().st_mtime_ns for e in entries if e.is_dir()}
+
+    async def _poll(self, video_dir: Path) -> None:
+        """Compare top-level folder mtimes; adding, removing or renaming a
+        file inside a folder bumps its mtime."""
+        known = await asyncio.to_thread(self._snapshot, video_dir)
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=settings.watch_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            current = await asyncio.to_thread(self._snapshot, video_dir)
+            for name in current.keys() | known.keys():
+                if current.get(name) != known.get(name):
+                    self._note(name)
+            known = current
+
+    async def _flush_loop(self) -> None:
+        debounce = settings.watch_debounce_seconds
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=min(debounce / 2, 1.0))
+                break
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            ready = [name for name, (_, last) in self._pending.items() if now - last >= debounce]
+            if not ready:
+                continue
+            first_event = min(self._pending[name][0] for name in ready)
+            for name in ready:
+                del self._pending[name]
+            try:
+                result = await scan_folders_async(ready)
+            except Exception:
+                logger.exception(f"Watcher sync failed for {len(ready)} folder(s)")
+                continue
+            self._waiting.difference_update(ready)
+            self._waiting.update(result["incomplete"])
+            self.syncs += 1
+            self.last_sync_lag = round(time.monotonic() - first_event, 3)
+
+
+watcher = LibraryWatcher()
@@ -0,0 +1,73 @@
+"""Compare two result files written by ``benchmarks.suite``.
+
+    python -m benchmarks.compare baseline.json results.json --fail-above 15
+
+Prints the p50/p99 latencies, durations and rates side by side with how
+much worse the current run is; rates (``*_per_second``, ``rps``) are
+flipped so that a positive number is always a regression and a negative
+one an improvement. With ``--fail-above``, exits 1 if any metric got worse by
+more than that many percent.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+_LOWER_IS_BETTER = ("p50_ms", "p99_ms", "seconds")
+_HIGHER_IS_BETTER = ("_per_second", "rps")
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """``{"scan/cold/seconds": 1.2, ...}`` for the comparable metrics."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and key.endswith(_LOWER_IS_BETTER + _HIGHER_IS_BETTER):
+            flat[path] = value
+    return flat
+
+
+def worse_by(metric: str, old: float, new: float) -> float:
+    """Percent by which ``new`` is worse than ``old`` (negative if better)."""
+    if not old:
+        return 0.0
+    change = (new - old) / old * 100
+    return -change if metric.endswith(_HIGHER_IS_BETTER) else change
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--fail-above", type=float, help="percent")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    old = flatten(baseline["results"])
+    new = flatten(current["results"])
+    print(f"baseline {baseline['meta'].get('commit')}  current {current['meta'].get('commit')}")
+
+    regressions = []
+    width = max((len(metric) for metric in old.keys() | new.keys()), default=10)
+    print(f"{'metric':<{width}}  {'baseline':>12}  {'current':>12}  {'worse by':>8}")
+    for metric in sorted(old.keys() | new.keys()):
+        if metric not in old or metric not in new:
+            print(f"{metric:<{width}}  {old.get(metric, '-'):>12}  {new.get(metric, '-'):>12}")
+            continue
+        worse = worse_by(metric, old[metric], new[metric])
+        flag = ""
+        if args.fail_above is not None and worse > args.fail_above:
+            regressions.append(metric)
+            flag = "  REGRESSION"
+        print(f"{metric:<{width}}  {old[metric]:>12}  {new[metric]:>12}  {worse:+7.1f}%{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} metric(s) worse by more than {args.fail_above}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Generate a synthetic VIDEO_DIR that looks like a yt-dlp download archive.
+
+    python -m benchmarks.generate_library /tmp/bench-lib --folders 10000
+
+Each folder holds ``<title> [<id>].info.json`` and a sparse ``.mp4``. Only
+the video id is written to the mp4, so streams read zeros without using
+disk space and content hashes still differ. The info.json files carry
+what makes real ones slow to scan: long ``formats`` arrays with signed
+URLs and headers, DASH fragment lists, automatic captions and thumbnail
+lists. Uploaders and tags follow a Zipf-like distribution, so a few tags
+are on many videos and most are rare.
+
+Output is deterministic for a given ``--seed``; re-running over an existing
+directory rewrites the same files.
+"""
+import argparse
+import itertools
+import json
+import random
+import string
+import time
+from pathlib import Path
+
+EXTRACTORS = (("youtube", 0.7), ("tiktok", 0.2), ("twitter", 0.1))
+WORDS = (
+    "music live official video remix cover tutorial review vlog travel food cooking gaming speedrun "
+    "highlights news interview podcast trailer reaction unboxing diy art drawing anime cats dogs "
+    "football basketball workout yoga science space history coding python linux cars drift camping"
+).split()
+CAPTION_LANGS = ("en", "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh-Hans", "ar", "hi", "tr", "pl", "nl")
+CAPTION_EXTS = ("json3", "srv1", "srv2", "srv3", "ttml", "vtt")
+_ID_CHARS = string.ascii_letters + string.digits + "-_"
+
+
+def _zipf_cum_weights(n: int, s: float = 1.1) -> list[float]:
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _url(rng: random.Random, host: str, length: int) -> str:
+    query = "".join(rng.choices(string.ascii_letters + string.digits, k=length))
+    return f"https://{host}/videoplayback?expire={rng.randint(10**9, 2 * 10**9)}&sig={query}"
+
+
+def _formats(rng: random.Random, extractor: str, duration: int) -> list[dict]:
+    formats = []
+    for n in range(rng.randint(20, 60)):
+        height = rng.choice((144, 240, 360, 480, 720, 1080, 1440, 2160))
+        fmt = {
+            "format_id": str(100 + n),
+            "format_note": f"{height}p",
+            "ext": rng.choice(("mp4", "webm", "m4a")),
+            "protocol": rng.choice(("https", "http_dash_segments", "m3u8_native")),
+            "vcodec": rng.choice(("avc1.640028", "vp09.00.40.08", "av01.0.08M.08", "none")),
+            "acodec": rng.choice(("mp4a.40.2", "opus", "none")),
+            "width": height * 16 // 9,
+            "height": height,
+            "fps": rng.choice((24, 25, 30, 60)),
+            "tbr": round(rng.uniform(50, 8000), 3),
+            "filesize": rng.randint(10**5, 10**9),
+            "url": _url(rng, f"rr{rng.randint(1, 9)}---sn-{extractor}.example.com", rng.randint(300, 900)),
+            "http_headers": {
+                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-us,en;q=0.5",
+                "Sec-Fetch-Mode": "navigate",
+            },
+        }
+        if fmt["protocol"] == "http_dash_segments" and rng.random() < 0.3:
+            fmt["fragments"] = [
+                {"url": f"sq/{i}", "duration": 5.0} for i in range(max(duration // 5, 1))
+            ]
+        formats.append(fmt)
+    return formats
+
+
+def _captions(rng: random.Random) -> dict:
+    return {
+        lang: [
+            {"ext": ext, "url": _url(rng, "www.youtube.com/api/timedtext", 200), "name": lang}
+            for ext in CAPTION_EXTS
+        ]
+        for lang in rng.sample(CAPTION_LANGS, rng.randint(0, len(CAPTION_LANGS)))
+    }
+
+
+def make_info(index: int, seed: int, tags: list[str], tag_weights: list[float], uploader_weights: list[float]) -> dict:
+    rng = random.Random(seed * 1_000_003 + index)
+    extractor = rng.choices([e for e, _ in EXTRACTORS], weights=[w for _, w in EXTRACTORS])[0]
+    video_id = "".join(rng.choices(_ID_CHARS, k=11 if extractor == "youtube" else 19))
+    uploader_rank = rng.choices(range(len(uploader_weights)), cum_weights=uploader_weights)[0]
+    uploader = f"{rng.choice(WORDS).title()}Channel{uploader_rank}"
+    duration = int(rng.lognormvariate(5.5, 1.0))
+    height = rng.choice((720, 1080, 1920))
+    width = height * 9 // 16 if extractor == "tiktok" else height * 16 // 9
+    timestamp = 1_500_000_000 + rng.randint(0, 250_000_000)
+    title = " ".join(rng.choices(WORDS, k=rng.randint(2, 9))).capitalize()
+    video_tags = sorted(set(rng.choices(tags, cum_weights=tag_weights, k=rng.randint(0, 25))))
+    return {
+        "id": video_id,
+        "title": title,
+        "fulltitle": title,
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 400))),
+        "uploader": uploader,
+        "uploader_id": f"@{uploader.lower()}",
+        "uploader_url": f"https://www.{extractor}.com/@{uploader.lower()}",
+        "channel": uploader,
+        "webpage_url": f"https://www.{extractor}.com/watch?v={video_id}",
+        "thumbnail": f"https://i.example.com/vi/{video_id}/maxresdefault.jpg",
+        "thumbnails": [
+            {"url": f"https://i.example.com/vi/{video_id}/{n}.jpg", "preference": -n, "id": str(n)}
+            for n in range(rng.randint(5, 40))
+        ],
+        "duration": duration,
+        "width": width,
+        "height": height,
+        "aspect_ratio": round(width / height, 2),
+        "fps": 30,
+        "view_count": rng.randint(0, 10**8),
+        "like_count": rng.randint(0, 10**6),
+        "comment_count": rng.randint(0, 10**5),
+        "repost_count": rng.randint(0, 10**4) if extractor == "tiktok" else None,
+        "extractor": extractor,
+        "extractor_key": extractor.title(),
+        "timestamp": timestamp,
+        "upload_date": time.strftime("%Y%m%d", time.gmtime(timestamp)),
+        "epoch": timestamp + rng.randint(0, 10**7),
+        "tags": video_tags,
+        "categories": [rng.choice(("Music", "Gaming", "Entertainment", "Education", "People & Blogs"))],
+        "formats": _formats(rng, extractor, duration),
+        "automatic_captions": _captions(rng) if extractor == "youtube" else {},
+        "_type": "video",
+        "_version": {"version": "2024.08.06", "repository": "yt-dlp/yt-dlp"},
+    }
+
+
+def generate(root: Path, folders: int, seed: int, tag_count: int, uploaders: int, mp4_size: int) -> dict:
+    root.mkdir(parents=True, exist_ok=True)
+    tag_rng = random.Random(seed)
+    tags = [f"{tag_rng.choice(WORDS)}{n}" if n >= len(WORDS) else WORDS[n] for n in range(tag_count)]
+    tag_weights = _zipf_cum_weights(tag_count)
+    uploader_weights = _zipf_cum_weights(uploaders)
+    json_bytes = 0
+    start = time.monotonic()
+    for index in range(folders):
+        info = make_info(index, seed, tags, tag_weights, uploader_weights)
+        stem = f"{info['title'][:60]} [{info['id']}]"
+        folder = root / f"{info['upload_date']} - {stem}"
+        folder.mkdir(exist_ok=True)
+        data = json.dumps(info, ensure_ascii=False).encode("utf-8")
+        (folder / f"{stem}.info.json").write_bytes(data)
+        json_bytes += len(data)
+        with open(folder / f"{stem}.mp4", "wb") as f:
+            f.write(info["id"].encode())
+            f.truncate(mp4_size)
+    return {
+        "folders": folders,
+        "json_bytes": json_bytes,
+        "mp4_size": mp4_size,
+        "seconds": round(time.monotonic() - start, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--folders", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tags", type=int, default=5000, help="tag vocabulary size")
+    parser.add_argument("--uploaders", type=int, default=500)
+    parser.add_argument("--mp4-size", type=int, default=50 * 1024 * 1024, help="bytes (sparse)")
+    args = parser.parse_args()
+    print(json.dumps(generate(args.root, args.folders, args.seed, args.tags, args.uploaders, args.mp4_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
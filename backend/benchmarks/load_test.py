@@ -0,0 +1,89 @@
+"""HTTP load test for a running server: grid pages mixed with stream reads.
+
+    pip install httpx
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 200 --duration 20
+
+Each client loops over a random grid page (``GET /api/videos``) or, for a
+``--stream-ratio`` share of requests, the first 1 MB of a random video's
+stream. Reports requests/sec and latency percentiles per request kind.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from .stats import percentile
+
+
+def _summary(samples: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 1),
+        "p99_ms": round(percentile(samples, 99) * 1000, 1),
+        "max_ms": round(max(samples, default=0.0) * 1000, 1),
+    }
+
+
+async def _client(http: httpx.AsyncClient, video_ids: list[str], deadline: float, stream_ratio: float, results: dict) -> None:
+    while time.monotonic() < deadline:
+        if video_ids and random.random() < stream_ratio:
+            kind = "stream"
+            request = http.get(
+                f"/api/videos/{random.choice(video_ids)}/stream",
+                headers={"Range": "bytes=0-1048575"},
+            )
+        else:
+            kind = "grid"
+            request = http.get("/api/videos", params={"page": random.randint(1, 20), "page_size": 48})
+        t = time.monotonic()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples, errors = results[kind]
+        if ok:
+            samples.append(time.monotonic() - t)
+        else:
+            results[kind] = (samples, errors + 1)
+
+
+async def run(url: str, concurrency: int, duration: float, stream_ratio: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as http:
+        page = (await http.get("/api/videos", params={"page_size": 200, "include_total": False})).json()
+        video_ids = [item["id"] for item in page["items"]]
+        results = {"grid": ([], 0), "stream": ([], 0)}
+        start = time.monotonic()
+        deadline = start + duration
+        await asyncio.gather(*(
+            _client(http, video_ids, deadline, stream_ratio, results) for _ in range(concurrency)
+        ))
+        elapsed = time.monotonic() - start
+
+    all_samples = [s for samples, _ in results.values() for s in samples]
+    return {
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 1),
+        "total": _summary(all_samples, sum(e for _, e in results.values()), elapsed),
+        **{kind: _summary(samples, errors, elapsed) for kind, (samples, errors) in results.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--stream-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.concurrency, args.duration, args.stream_ratio)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
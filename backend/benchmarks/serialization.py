@@ -0,0 +1,75 @@
+"""Compare response serialization paths for /api/videos pages.
+
+    DATABASE_URL=sqlite:////data/media.db python -m benchmarks.serialization --page-size 200
+
+Loads pages through ``crud.get_videos`` once, then times turning them into
+JSON bytes the pydantic way (models, then ``model_dump_json``) and with
+``app.serialization``. Checks both produce the same JSON and prints
+per-page timings as JSON.
+"""
+import argparse
+import json
+import time
+
+from app import crud
+from app.database import ReadSessionLocal
+from app.schemas import VideoDetail, VideoListResponse, VideoSummary
+from app.serialization import video_detail_json, video_list_json
+
+
+def _pydantic_list(items, total, page, page_size, next_cursor) -> bytes:
+    return VideoListResponse(
+        items=[VideoSummary(**item) for item in items],
+        total=total,
+        page=page,
+        page_size=page_size,
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
+    ).model_dump_json().encode()
+
+
+def _time(fn, pages: list, rounds: int) -> float:
+    """Median milliseconds per page."""
+    samples = []
+    for _ in range(rounds):
+        for args in pages:
+            t = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - t)
+    samples.sort()
+    return round(samples[len(samples) // 2] * 1000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with ReadSessionLocal() as db:
+        pages = []
+        for page in range(1, args.pages + 1):
+            items, total, next_cursor = crud.get_videos(db, page=page, page_size=args.page_size)
+            pages.append((items, total, page, args.page_size, next_cursor))
+        details = [(crud.get_video_detail(db, item["id"]),) for item in pages[0][0][:50]]
+
+    for page in pages:
+        assert json.loads(_pydantic_list(*page)) == json.loads(video_list_json(*page))
+    for (detail,) in details:
+        assert json.loads(VideoDetail(**detail).model_dump_json()) == json.loads(video_detail_json(detail))
+
+    pydantic_ms = _time(_pydantic_list, pages, args.rounds)
+    fast_ms = _time(video_list_json, pages, args.rounds)
+    print(json.dumps({
+        "page_size": args.page_size,
+        "list_pydantic_ms": pydantic_ms,
+        "list_fast_ms": fast_ms,
+        "list_speedup": round(pydantic_ms / fast_ms, 1) if fast_ms else None,
+        "detail_pydantic_ms": _time(lambda d: VideoDetail(**d).model_dump_json(), details, args.rounds),
+        "detail_fast_ms": _time(video_detail_json, details, args.rounds),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Benchmark scenarios run in-process against a (generated) library.
+
+    python -m benchmarks.generate_library /tmp/bench-lib --folders 10000
+    python -m benchmarks.suite /tmp/bench-lib --workdir /tmp/bench --output results.json
+    python -m benchmarks.compare baseline.json results.json
+
+Scenarios (``--only`` picks some):
+
+    scan    cold scan into an empty database and metadata cache, a warm
+            rescan with nothing changed, and a full rescan
+    list    crud.get_videos: first page, deep offset, cursor walk, big
+            pages, tag filters and text search
+    tags    crud.get_tags autocomplete, and the in-memory tag index
+    stream  concurrent range requests through the ASGI app
+
+The database lives in ``--workdir``; running ``scan`` recreates it, the
+other scenarios reuse whatever is there. The OS page cache is not dropped,
+so "cold" means an empty database, not cold disks. The stream clients share
+the app's event loop, so that scenario measures the app's per-request cost
+rather than network throughput (use ``load_test`` for that).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .stats import latency_summary
+
+SCENARIOS = ("scan", "list", "tags", "stream")
+
+
+def _configure(library: Path, workdir: Path, fresh: bool) -> None:
+    """Point the app at ``library`` and ``workdir``; must run before any
+    ``app`` import, since settings are read then."""
+    workdir = workdir.resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    if fresh:
+        for path in workdir.glob("media.db*"):
+            path.unlink()
+        shutil.rmtree(workdir / "metadata-cache", ignore_errors=True)
+    os.environ.update(
+        VIDEO_DIR=str(library.resolve()),
+        DATABASE_URL=f"sqlite:///{workdir / 'media.db'}",
+        SCAN_ON_STARTUP="false",
+        WATCH_LIBRARY="false",
+        TAG_INDEX_ENABLED="false",
+        RESPONSE_CACHE_ENABLED="false",
+    )
+
+
+def _measure(fn, repeat: int, warmup: int = 2) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+def _top_tags(db, limit: int) -> list[str]:
+    from sqlalchemy import select
+
+    from app.models import Tag
+    return list(db.scalars(select(Tag.name).order_by(Tag.video_count.desc(), Tag.name).limit(limit)))
+
+
+def scenario_scan(args) -> dict:
+    from app.scanner import scan_videos
+
+    results = {}
+    for name, full in (("cold", False), ("warm", False), ("full", True)):
+        start = time.perf_counter()
+        stats = scan_videos(full=full)
+        elapsed = time.perf_counter() - start
+        folders = stats["added"] + stats["updated"] + stats["skipped"]
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "folders_per_second": round(folders / elapsed, 1) if elapsed else None,
+            "added": stats["added"],
+            "updated": stats["updated"],
+            "skipped": stats["skipped"],
+        }
+    return results
+
+
+def scenario_list(args) -> dict:
+    from app import crud, search
+    from app.database import ReadSessionLocal
+
+    with ReadSessionLocal() as db:
+        top = _top_tags(db, 4)
+        _, total, _ = crud.get_videos(db)
+        cases = {
+            "first_page": {},
+            "first_page_no_total": {"with_total": False},
+            "deep_offset": {"page": max(total // 24 // 2, 1)},
+            "page_size_200": {"page_size": 200},
+        }
+        if len(top) >= 4:
+            cases["tag_common"] = {"tags": top[:1]}
+            cases["tags_all_of_two"] = {"tags": top[:2]}
+            cases["tags_any_exclude"] = {"any_tags": top[2:4], "exclude_tags": top[:1]}
+        if search.SEARCH_ENABLED:
+            cases["text_search"] = {"text_query": "music tutorial"}
+        results = {
+            name: _measure(lambda kwargs=kwargs: crud.get_videos(db, **kwargs), args.repeat)
+            for name, kwargs in cases.items()
+        }
+
+        cursor = None
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            _, _, cursor = crud.get_videos(db, cursor=cursor, with_total=False)
+            samples.append(time.perf_counter() - start)
+        results["cursor_walk"] = latency_summary(samples)
+    return {"videos": total, **results}
+
+
+def scenario_tags(args) -> dict:
+    from app import crud
+    from app.database import ReadSessionLocal
+    from app.tag_index import TagIndex
+
+    with ReadSessionLocal() as db:
+        top = _top_tags(db, 3) or ["music"]
+        word = max(top, key=len)
+        queries = {
+            "empty": None,
+            "one_char": top[0][:1],
+            "two_chars": top[-1][:2],
+            "prefix": word[:4],
+            "no_match": "zzqxj",
+        }
+        results = {
+            f"sql_{name}": _measure(lambda q=q: crud.get_tags(db, q, 20), args.repeat)
+            for name, q in queries.items()
+        }
+
+    index = TagIndex()
+    start = time.perf_counter()
+    index.load()
+    results["index_load_seconds"] = round(time.perf_counter() - start, 3)
+    results["index_memory_bytes"] = index.memory_bytes()
+    queries["infix"] = word[1:4]
+    if len(word) >= 4:
+        queries["typo"] = word[:1] + word[2] + word[1] + word[3:]
+    for name, q in queries.items():
+        results[f"index_{name}"] = _measure(lambda q=q: index.search(q, 20), args.repeat)
+    return results
+
+
+async def _stream(concurrency: int, duration: float, chunk: int) -> dict:
+    import httpx
+    from sqlalchemy import select
+
+    from app.database import ReadSessionLocal, async_read_engine
+    from app.main import app
+    from app.models import Video
+
+    with ReadSessionLocal() as db:
+        media = db.execute(
+            select(Video.id, Video.media_size)
+            .where(Video.is_available == True, Video.media_size > 0)  # noqa: E712
+            .limit(1000)
+        ).all()
+    if not media:
+        return {"error": "no media in the database; run the scan scenario first"}
+
+    samples: list[float] = []
+    errors = 0
+    received = 0
+
+    async def client(http: httpx.AsyncClient, deadline: float) -> None:
+        nonlocal errors, received
+        while time.monotonic() < deadline:
+            video_id, size = random.choice(media)
+            offset = random.randrange(0, max(size - chunk, 1))
+            start = time.perf_counter()
+            response = await http.get(
+                f"/api/videos/{video_id}/stream",
+                headers={"Range": f"bytes={offset}-{offset + chunk - 1}"},
+            )
+            if response.status_code != 206:
+                errors += 1
+                continue
+            samples.append(time.perf_counter() - start)
+            received += len(response.content)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.monotonic()
+        await asyncio.gather(*(client(http, start + duration) for _ in range(concurrency)))
+        elapsed = time.monotonic() - start
+    # Normally done by the app's lifespan, which ASGITransport doesn't run
+    await async_read_engine.dispose()
+    return {
+        "concurrency": concurrency,
+        "chunk_bytes": chunk,
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 1),
+        "mib_per_second": round(received / elapsed / 2**20, 1),
+        **latency_summary(samples),
+    }
+
+
+def scenario_stream(args) -> dict:
+    return asyncio.run(_stream(args.concurrency, args.duration, args.chunk))
+
+
+def _meta(library: Path) -> dict:
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent,
+    ).stdout.strip()
+    with os.scandir(library) as entries:
+        folders = sum(1 for e in entries if e.is_dir())
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "library": str(library),
+        "folders": folders,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("library", type=Path, help="VIDEO_DIR to benchmark against")
+    parser.add_argument("--workdir", type=Path, default=Path("bench-data"), help="database and caches")
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per query")
+    parser.add_argument("--concurrency", type=int, default=32, help="stream clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="stream seconds")
+    parser.add_argument("--chunk", type=int, default=1024 * 1024, help="bytes per range request")
+    parser.add_argument("--output", type=Path, help="write results here as well as to stdout")
+    args = parser.parse_args()
+
+    _configure(args.library, args.workdir, fresh="scan" in args.only)
+    from app.database import create_tables
+    create_tables()
+
+    results = {"meta": _meta(args.library), "results": {}}
+    for name in SCENARIOS:
+        if name in args.only:
+            results["results"][name] = globals()[f"scenario_{name}"](args)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import io
+import json
+import math
+
+from app import metadata
+
+INFO = {"id": "abc", "duration": float("nan"), "formats": [{"tbr": float("inf")}], "title": "t"}
+
+
+def test_json_loads_accepts_nan():
+    data = json.dumps(INFO).encode()
+    assert b"NaN" in data
+    loaded = metadata.json_loads(data)
+    assert math.isnan(loaded["duration"])
+    assert loaded["formats"] == [{"tbr": float("inf")}]
+
+
+def test_extract_fields_with_nan():
+    f = io.BytesIO(json.dumps(INFO).encode())
+    meta = metadata.extract_fields(f, ["duration", "title"])
+    assert math.isnan(meta["duration"])
+    assert meta["title"] == "t"
+
+
+def test_read_metadata_with_nan(tmp_path):
+    folder = tmp_path / "video [abc]"
+    folder.mkdir()
+    path = folder / "video [abc].info.json"
+    path.write_text(json.dumps(INFO))
+    meta = metadata.read_metadata(path, ["id", "duration"])
+    assert meta["id"] == "abc"
+    assert math.isnan(meta["duration"])
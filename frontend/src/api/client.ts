@@ -1,4 +1,4 @@
-import type { SortOrder, Tag, VideoDetail, VideoListResponse } from "../types";
+import type { Facet, ScanJob, SortOrder, Tag, VideoDetail, VideoListResponse } from "../types";
 
 const BASE = "/api";
 
@@ -17,15 +17,32 @@ export const api = {
     page_size?: number;
     sort?: SortOrder;
     tags?: string[];
+    any_tags?: string[];
+    exclude_tags?: string[];
     available_only?: boolean;
+    cursor?: string;
+    include_total?: boolean;
+    collapse_duplicates?: boolean;
+    facets?: Facet[];
+    facet_limit?: number;
   }): Promise<VideoListResponse> {
     const q = new URLSearchParams();
     q.set("page", String(params.page));
+    if (params.cursor) q.set("cursor", params.cursor);
+    if (params.include_total !== undefined)
+      q.set("include_total", String(params.include_total));
     if (params.page_size) q.set("page_size", String(params.page_size));
     if (params.sort) q.set("sort", params.sort);
     if (params.tags) params.tags.forEach((t) => q.append("tags", t));
+    if (params.any_tags) params.any_tags.forEach((t) => q.append("any_tags", t));
+    if (params.exclude_tags)
+      params.exclude_tags.forEach((t) => q.append("exclude_tags", t));
     if (params.available_only !== undefined)
       q.set("available_only", String(params.available_only));
+    if (params.collapse_duplicates)
+      q.set("collapse_duplicates", "true");
+    if (params.facets) params.facets.forEach((f) => q.append("facets", f));
+    if (params.facet_limit) q.set("facet_limit", String(params.facet_limit));
     return request<VideoListResponse>(`/videos?${q.toString()}`);
   },
 
@@ -54,7 +71,11 @@ export const api = {
     });
   },
 
-  rescan(): Promise<unknown> {
-    return request("/admin/rescan", { method: "POST" });
+  rescan(): Promise<ScanJob> {
+    return request<ScanJob>("/admin/rescan", { method: "POST" });
+  },
+
+  getScan(id: string): Promise<ScanJob> {
+    return request<ScanJob>(`/admin/scans/${id}`);
   },
 };
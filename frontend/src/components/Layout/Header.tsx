@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import { api } from "../../api/client";
+import type { ScanJob } from "../../types";
 import { SortControl } from "../Controls/SortControl";
 import { TagSearch } from "../TagFilter/TagSearch";
 
@@ -20,17 +21,33 @@ function useDarkMode() {
   return [dark, setDark] as const;
 }
 
+const SCAN_POLL_MS = 1000;
+
+function scanLabel(job: ScanJob | null): string {
+  if (!job || !job.folders_total) return "Scanning...";
+  const pct = Math.floor((job.folders_done / job.folders_total) * 100);
+  return `Scanning ${pct}%`;
+}
+
 export function Header() {
   const [dark, setDark] = useDarkMode();
   const [scanning, setScanning] = useState(false);
+  const [job, setJob] = useState<ScanJob | null>(null);
 
   const handleRescan = async () => {
     setScanning(true);
     try {
-      await api.rescan();
+      // The scan runs in the background; poll until it finishes
+      let current = await api.rescan();
+      while (current.status === "running") {
+        setJob(current);
+        await new Promise((resolve) => setTimeout(resolve, SCAN_POLL_MS));
+        current = await api.getScan(current.id);
+      }
       window.location.reload();
     } finally {
       setScanning(false);
+      setJob(null);
     }
   };
 
@@ -56,7 +73,7 @@ export function Header() {
             title="Rescan video directory"
             className="text-sm px-3 py-1.5 border border-gray-300 dark:border-gray-600 rounded-lg text-gray-600 dark:text-gray-300 hover:bg-gray-100 dark:hover:bg-gray-800 disabled:opacity-50 transition-colors"
           >
-            {scanning ? "Scanning..." : "🔄 Rescan"}
+            {scanning ? scanLabel(job) : "🔄 Rescan"}
           </button>
 
           {/* Dark mode toggle */}
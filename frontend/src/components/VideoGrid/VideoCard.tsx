@@ -20,7 +20,14 @@ function formatCount(n: number): string {
 }
 
 export function VideoCard({ video, onClick }: VideoCardProps) {
-  const [thumbError, setThumbError] = useState(false);
+  // Served locally first; fall back to the remote URL, then the placeholder
+  const [thumbSource, setThumbSource] = useState<"local" | "remote" | "none">("local");
+  const thumbSrc =
+    thumbSource === "local"
+      ? `/api/videos/${video.id}/thumbnail?w=320`
+      : thumbSource === "remote"
+        ? video.thumbnail
+        : null;
   const addTag = useFilterStore((s) => s.addTag);
 
   return (
@@ -30,12 +37,13 @@ export function VideoCard({ video, onClick }: VideoCardProps) {
         className="relative cursor-pointer bg-gray-900 aspect-video overflow-hidden"
         onClick={onClick}
       >
-        {video.thumbnail && !thumbError ? (
+        {thumbSrc ? (
           <img
-            src={video.thumbnail}
+            src={thumbSrc}
             alt={video.title ?? ""}
+            loading="lazy"
             className="w-full h-full object-cover"
-            onError={() => setThumbError(true)}
+            onError={() => setThumbSource(thumbSource === "local" ? "remote" : "none")}
           />
         ) : (
           <div className="w-full h-full flex items-center justify-center text-gray-500">
@@ -77,6 +77,7 @@ export function VideoModal({ video, onClose }: VideoModalProps) {
             autoPlay
             className="w-full max-h-[60vh] object-contain"
             src={`/api/videos/${video.id}/stream`}
+            poster={`/api/videos/${video.id}/thumbnail?w=640`}
           />
         </div>
 
@@ -9,13 +9,18 @@ export function useVideos() {
     queryKey: ["videos", { sort: sortOrder, tags: activeTags }],
     queryFn: ({ pageParam }) =>
       api.getVideos({
-        page: pageParam as number,
+        page: pageParam.page,
         page_size: 24,
         sort: sortOrder,
         tags: activeTags.length > 0 ? activeTags : undefined,
+        // Later pages seek from the cursor and skip the count
+        cursor: pageParam.cursor,
+        include_total: pageParam.cursor === undefined,
       }),
-    initialPageParam: 1,
+    initialPageParam: { page: 1 } as { page: number; cursor?: string },
     getNextPageParam: (lastPage) =>
-      lastPage.has_next ? lastPage.page + 1 : undefined,
+      lastPage.has_next && lastPage.next_cursor
+        ? { page: lastPage.page + 1, cursor: lastPage.next_cursor }
+        : undefined,
   });
 }
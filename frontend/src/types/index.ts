@@ -30,12 +30,31 @@ export interface VideoDetail extends VideoSummary {
   description: string | null;
 }
 
+export type Facet = "uploader" | "extractor" | "duration" | "tags";
+
+export interface FacetCount {
+  value: string;
+  count: number;
+}
+
 export interface VideoListResponse {
   items: VideoSummary[];
-  total: number;
+  total: number | null;
   page: number;
   page_size: number;
   has_next: boolean;
+  next_cursor: string | null;
+  facets: Partial<Record<Facet, FacetCount[]>> | null;
 }
 
 export type SortOrder = "epoch_desc" | "epoch_asc";
+
+export interface ScanJob {
+  id: string;
+  status: "running" | "completed" | "cancelled" | "failed";
+  phase: string;
+  folders_total: number | null;
+  folders_done: number;
+  eta_seconds: number | null;
+  error: string | null;
+}